@@ -1,9 +1,143 @@
 # colreader.py
 
-import collections
+import collections.abc
 import csv
+from collections import Counter
+from array import array
+from sys import intern
 
-class DataCollection(collections.Sequence):
+class ArrayColumn(collections.abc.Sequence):
+    '''
+    A column of numbers packed into an array.array.  Slicing returns
+    a view onto the same buffer rather than a copy.  The array can't grow
+    while viewed, so appending after slicing moves the column to a copy
+    and leaves the slices with the old buffer.
+    '''
+    def __init__(self, typecode, data=None):
+        self.typecode = typecode
+        self.data = array(typecode) if data is None else data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ArrayColumn(self.typecode, memoryview(self.data)[index])
+        return self.data[index]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def append(self, value):
+        try:
+            self.data.append(value)
+        except BufferError:
+            self.data = array(self.typecode, self.data)
+            self.data.append(value)
+
+class StringColumn(collections.abc.Sequence):
+    '''
+    A dictionary-encoded column.  Each distinct value is stored once
+    (interned) and rows hold an integer code into that table.  Slices
+    view the codes as ArrayColumn slices do.
+    '''
+    def __init__(self, codes=None, values=None, index=None):
+        self.codes = array('I') if codes is None else codes
+        self.values = [] if values is None else values    # code -> value
+        self.index = {} if index is None else index       # value -> code
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return StringColumn(memoryview(self.codes)[index], self.values, self.index)
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(intern(value) if isinstance(value, str) else value)
+        try:
+            self.codes.append(code)
+        except BufferError:
+            self.codes = array('I', self.codes)
+            self.codes.append(code)
+
+    def map(self, func):
+        '''
+        Apply func to each distinct value (not each row) and return
+        a new encoded column.  E.g. extracting the year from a date.
+        '''
+        result = StringColumn()
+        recode = [ result.index.setdefault(func(value), len(result.index))
+                   for value in self.values ]
+        result.values = list(result.index)
+        result.codes = array('I', [ recode[code] for code in self.codes ])
+        return result
+
+def encode(column):
+    '''
+    Return column as a StringColumn, encoding it if necessary
+    '''
+    if isinstance(column, StringColumn):
+        return column
+    encoded = StringColumn()
+    for value in column:
+        encoded.append(value)
+    return encoded
+
+class GroupBy:
+    '''
+    Aggregations over the rows of a DataCollection grouped by the values
+    of one or more columns.  Works directly on the column codes; results
+    are Counters so most_common(n) gives the top-N groups.
+    '''
+    def __init__(self, data, names):
+        self.data = data
+        self.keys = [ encode(data.column(name)) for name in names ]
+        # Combine the codes of several key columns into a single code
+        codes = self.keys[0].codes
+        for key in self.keys[1:]:
+            size = len(key.values)
+            codes = [ code * size + keycode for code, keycode in zip(codes, key.codes) ]
+        self.codes = codes
+
+    def _label(self, code):
+        if len(self.keys) == 1:
+            return self.keys[0].values[code]
+        label = []
+        for key in reversed(self.keys):
+            code, keycode = divmod(code, len(key.values))
+            label.append(key.values[keycode])
+        return tuple(reversed(label))
+
+    def count(self):
+        return Counter({ self._label(code): n for code, n in Counter(self.codes).items() })
+
+    def sum(self, name):
+        groups = Counter(self.codes)
+        totals = dict.fromkeys(groups, 0)
+        for code, value in zip(self.codes, self.data.column(name)):
+            totals[code] += value
+        return Counter({ self._label(code): total for code, total in totals.items() })
+
+# Array typecodes used for numeric column types
+_typecodes = { int: 'q', float: 'd' }
+
+def make_column(func):
+    '''
+    Make an empty column suitable for values produced by func
+    '''
+    if func in _typecodes:
+        return ArrayColumn(_typecodes[func])
+    return StringColumn()
+
+class DataCollection(collections.abc.Sequence):
     def __init__(self, columns):
         self.column_names = list(columns)
         self.column_data = list(columns.values())
@@ -12,26 +146,62 @@ class DataCollection(collections.Sequence):
         return len(self.column_data[0])
 
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DataCollection(dict(zip(self.column_names,
+                                           (col[index] for col in self.column_data))))
         return dict(zip(self.column_names,
                         (col[index] for col in self.column_data)))
 
+    def column(self, name):
+        return self.column_data[self.column_names.index(name)]
+
+    def add_column(self, name, column):
+        self.column_names.append(name)
+        self.column_data.append(column)
+
+    def groupby(self, *names):
+        return GroupBy(self, names)
+
 
 def read_csv_as_columns(filename, types):
-    columns = collections.defaultdict(list)
     with open(filename) as f:
         rows = csv.reader(f)
         headers = next(rows)
+        columns = { name: make_column(func) for name, func in zip(headers, types) }
         for row in rows:
             for name, func, val in zip(headers, types, row):
                 columns[name].append(func(val))
-            
+
     return DataCollection(columns)
 
 if __name__ == '__main__':
+    import sys
+    import time
     import tracemalloc
-    from sys import intern
 
+    filename = sys.argv[1] if len(sys.argv) > 1 else '../../Data/ctabus.csv'
     tracemalloc.start()
-    data = read_csv_as_columns('../../Data/ctabus.csv', [intern, intern, intern, int])
+    data = read_csv_as_columns(filename, [intern, intern, intern, int])
     print(tracemalloc.get_traced_memory())
+    tracemalloc.stop()
+
+    # Compare the row-by-row Counter approach of cta.py with GroupBy
+    start = time.perf_counter()
+    rides_per_route = Counter()
+    rides_by_year = collections.defaultdict(Counter)
+    for row in data:
+        rides_per_route[row['route']] += row['rides']
+        rides_by_year[row['date'].split('/')[2]][row['route']] += row['rides']
+    print('Counter rows: %0.3fs' % (time.perf_counter() - start))
+
+    start = time.perf_counter()
+    by_route = data.groupby('route').sum('rides')
+    data.add_column('year', data.column('date').map(lambda d: d.split('/')[2]))
+    by_year_route = data.groupby('year', 'route').sum('rides')
+    print('GroupBy columns: %0.3fs' % (time.perf_counter() - start))
 
+    assert by_route == rides_per_route
+    assert all(by_year_route[year, route] == n
+               for year, counts in rides_by_year.items()
+               for route, n in counts.items())
+    print(by_route.most_common(5))
@@ -0,0 +1,112 @@
+# testcolreader.py
+
+import csv
+import os
+import tempfile
+import unittest
+from sys import intern
+from colreader import read_csv_as_columns, ArrayColumn, StringColumn
+
+rows = [
+    ('3', '01/01/2001', 'U', 7354),
+    ('4', '01/01/2001', 'U', 9288),
+    ('3', '01/02/2001', 'W', 9900),
+    ('3', '01/01/2002', 'U', 100),
+    ('4', '01/02/2002', 'W', 250),
+    ('6', '01/03/2002', 'W', 50),
+]
+
+class TestColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'rides.csv')
+            with open(filename, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['route', 'date', 'daytype', 'rides'])
+                writer.writerows(rows)
+            cls.data = read_csv_as_columns(filename, [intern, intern, intern, int])
+
+    def test_read(self):
+        self.assertEqual(len(self.data), len(rows))
+        self.assertEqual(self.data[1],
+                         {'route': '4', 'date': '01/01/2001', 'daytype': 'U', 'rides': 9288})
+        self.assertIsInstance(self.data.column('route'), StringColumn)
+
+    def test_indexing(self):
+        rides = self.data.column('rides')
+        self.assertIsInstance(rides, ArrayColumn)
+        self.assertEqual(rides[2], 9900)
+        self.assertEqual(rides[-1], 50)
+        self.assertEqual(list(rides[1:4]), [9288, 9900, 100])
+        self.assertEqual(list(rides[::2]), [7354, 9900, 250])
+        self.assertEqual(list(rides[4:0:-2]), [250, 9900])
+        self.assertEqual(len(rides[::2]), 3)
+
+        routes = self.data.column('route')
+        self.assertEqual(routes[3], '3')
+        self.assertEqual(list(routes[1::2]), ['4', '3', '6'])
+        self.assertEqual(routes[1::2][2], '6')
+
+        self.assertEqual(self.data[-1],
+                         {'route': '6', 'date': '01/03/2002', 'daytype': 'W', 'rides': 50})
+        part = self.data[1::2]
+        self.assertEqual(len(part), 3)
+        self.assertEqual(part[0], self.data[1])
+        self.assertEqual(list(part.column('rides')), [9288, 100, 50])
+
+    def test_slices_are_views(self):
+        rides = self.data.column('rides')
+        self.assertIsInstance(rides[1:3].data, memoryview)
+        self.assertIs(rides[1:3].data.obj, rides.data)
+        routes = self.data.column('route')
+        self.assertIs(routes[::2].codes.obj, routes.codes)
+        self.assertIs(routes[::2].values, routes.values)
+
+    def test_append_after_slice(self):
+        column = ArrayColumn('q')
+        for n in range(5):
+            column.append(n)
+        part = column[1:3]
+        column.append(5)
+        self.assertEqual(list(column), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(list(part), [1, 2])
+
+        column = StringColumn()
+        for value in 'abca':
+            column.append(value)
+        part = column[::2]
+        column.append('d')
+        self.assertEqual(list(column), ['a', 'b', 'c', 'a', 'd'])
+        self.assertEqual(list(part), ['a', 'c'])
+
+    def test_map(self):
+        years = self.data.column('date').map(lambda d: d.split('/')[2])
+        self.assertEqual(list(years), [ date.split('/')[2] for _, date, _, _ in rows ])
+        self.assertEqual(years.values, ['2001', '2002'])
+
+    def test_count(self):
+        self.assertEqual(self.data.groupby('route').count(), {'3': 3, '4': 2, '6': 1})
+
+    def test_sum(self):
+        by_route = self.data.groupby('route').sum('rides')
+        self.assertEqual(by_route, {'3': 17354, '4': 9538, '6': 50})
+        self.assertEqual(by_route.most_common(2), [('3', 17354), ('4', 9538)])
+
+    def test_multiple_keys(self):
+        self.data.add_column('year', self.data.column('date').map(lambda d: d.split('/')[2]))
+        try:
+            by_year_route = self.data.groupby('year', 'route').sum('rides')
+            self.assertEqual(by_year_route, {('2001', '3'): 17254, ('2001', '4'): 9288,
+                                             ('2002', '3'): 100, ('2002', '4'): 250,
+                                             ('2002', '6'): 50})
+            self.assertEqual(by_year_route.most_common(1), [(('2001', '3'), 17254)])
+            self.assertEqual(self.data.groupby('daytype', 'year').count(),
+                             {('U', '2001'): 2, ('W', '2001'): 1,
+                              ('U', '2002'): 1, ('W', '2002'): 2})
+        finally:
+            self.data.column_names.pop()
+            self.data.column_data.pop()
+
+if __name__ == '__main__':
+    unittest.main()
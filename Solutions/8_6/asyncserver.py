@@ -1,34 +1,154 @@
 # server.py
 
 from socket import *
-from select import select
+from selectors import DefaultSelector, EVENT_READ, EVENT_WRITE
 from collections import deque
+import heapq
+import itertools
+import time
 from types import coroutine
+import weakref
 
 tasks = deque()
-recv_wait = {}   #  sock -> task
-send_wait = {}   #  sock -> task
+
+# Sockets are registered with the selector (epoll on Linux) the first
+# time a task waits on them and stay registered, so waiting costs nothing
+# when a task waits for the same thing again and a modify() when it
+# switches between recv and send.  The data of each key is a list
+# [weakref to socket, task waiting to recv, task waiting to send], the
+# tasks indexed by EVENT_READ (1) and EVENT_WRITE (2).  The weakref lets
+# a socket that's been dropped be closed, which removes it from epoll.
+# A socket is unregistered when the last task that waited on it finishes.
+selector = DefaultSelector()
+waiting = 0     # Number of tasks waiting on sockets
+watched = {}    # task -> {fd: key data} for the sockets it has waited on
+
+# Timers.  sleeping is a heap of [deadline, sequence number, task, fd, event]
+# entries.  fd is None for a task that's sleeping.  Otherwise the task is
+# waiting on the socket with a timeout, and it's woken with a TimeoutError
+# if the socket isn't ready by the deadline.  A timer is cancelled by
+# setting its task to None, leaving the entry in the heap.
+sleeping = []
+timers = {}     # task -> its socket timeout entry in sleeping
+errors = {}     # task -> exception to throw into it when it next runs
+_sequence = itertools.count()
+
+def set_timer(task, seconds, fd=None, event=None):
+    entry = [time.monotonic() + seconds, next(_sequence), task, fd, event]
+    heapq.heappush(sleeping, entry)
+    if fd is not None:
+        timers[task] = entry
+
+def wake_timers():
+    now = time.monotonic()
+    while sleeping and sleeping[0][0] <= now:
+        deadline, _, task, fd, event = heapq.heappop(sleeping)
+        if task is None:
+            continue
+        if fd is not None:
+            del timers[task]
+            selector.get_key(fd).data[event] = None
+            errors[task] = TimeoutError()
+            global waiting
+            waiting -= 1
+        tasks.append(task)
+
+def unwatch(fd, data):
+    # Unregister a socket nobody is waiting on, if the fd is still its own
+    key = selector.get_map().get(fd)
+    if key and key.data is data and not (data[EVENT_READ] or data[EVENT_WRITE]):
+        selector.unregister(fd)
+
+def release(task):
+    for fd, data in watched.pop(task, {}).items():
+        unwatch(fd, data)
+
+def wait_for(sock, event, task, timeout=None):
+    global waiting
+    fd = sock.fileno()
+    try:
+        key = selector.get_key(fd)
+        if key.data[0]() is not sock:
+            # The fd belonged to a socket that has since been closed
+            selector.unregister(fd)
+            raise KeyError(fd)
+    except KeyError:
+        key = selector.register(fd, event, [weakref.ref(sock), None, None])
+    if not key.events & event:
+        key = selector.modify(fd, key.events | event, key.data)
+    if not key.data[event]:
+        waiting += 1
+    key.data[event] = task
+    mine = watched.setdefault(task, {})
+    if fd not in mine:
+        # Drop the sockets this task has closed since it last waited
+        for oldfd, data in list(mine.items()):
+            sock = data[0]()
+            if sock is None or sock.fileno() < 0:
+                del mine[oldfd]
+                unwatch(oldfd, data)
+        mine[fd] = key.data
+    if timeout is not None:
+        set_timer(task, timeout, fd, event)
+
+def wait_ready():
+    # Wait for sockets, but no longer than until the first timer is due
+    global waiting
+    timeout = max(0, sleeping[0][0] - time.monotonic()) if sleeping else None
+    for key, events in selector.select(timeout):
+        unwanted = 0
+        for event in (EVENT_READ, EVENT_WRITE):
+            if events & event:
+                task = key.data[event]
+                if task:
+                    tasks.append(task)
+                    key.data[event] = None
+                    waiting -= 1
+                    entry = timers.pop(task, None)
+                    if entry:
+                        entry[2] = None
+                else:
+                    unwanted |= event
+        # Stop watching for events nobody waited for.  Interest that is
+        # merely satisfied stays registered in case it's wanted again.
+        if unwanted:
+            if key.events & ~unwanted:
+                selector.modify(key.fd, key.events & ~unwanted, key.data)
+            else:
+                selector.unregister(key.fd)
+
+def pending():
+    # Cancelled timers don't count as work left to do
+    while sleeping and sleeping[0][2] is None:
+        heapq.heappop(sleeping)
+    return tasks or sleeping or waiting
 
 def run():
-    while any([tasks, recv_wait, send_wait]):
-        while not tasks:
-            can_recv, can_send, _ = select(recv_wait, send_wait, [])
-            for s in can_recv:
-                tasks.append(recv_wait.pop(s))
-            for s in can_send:
-                tasks.append(send_wait.pop(s))
+    while pending():
+        if not tasks:
+            wait_ready()
+            wake_timers()
+            continue
         task = tasks.popleft()
         try:
-            reason, resource = task.send(None)
+            error = errors.pop(task, None)
+            reason, resource, *timeout = task.throw(error) if error else task.send(None)
             if reason == 'recv':
-                recv_wait[resource] = task
+                wait_for(resource, EVENT_READ, task, *timeout)
             elif reason == 'send':
-                send_wait[resource] = task
+                wait_for(resource, EVENT_WRITE, task, *timeout)
+            elif reason == 'sleep':
+                set_timer(task, resource)
             else:
                 raise RuntimeError('Unknown reason %r' % reason)
         except StopIteration:
+            release(task)
             print('Task done')
 
+@coroutine
+def sleep(seconds):
+    yield 'sleep', seconds
+
 class GenSocket:
     def __init__(self, sock):
         self.sock = sock
@@ -40,8 +160,8 @@ class GenSocket:
         return GenSocket(client), addr
 
     @coroutine
-    def recv(self, maxsize):
-        yield 'recv', self.sock
+    def recv(self, maxsize, timeout=None):
+        yield 'recv', self.sock, timeout
         return self.sock.recv(maxsize)
 
     @coroutine
@@ -56,19 +176,25 @@ async def tcp_server(address, handler):
     sock = GenSocket(socket(AF_INET, SOCK_STREAM))
     sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
     sock.bind(address)
-    sock.listen(5)
+    sock.listen(SOMAXCONN)
     while True:
         client, addr = await sock.accept()
         tasks.append(handler(client, addr))
         
+IDLE_TIMEOUT = 300     # Seconds a connection may sit idle before it's closed
+
 async def echo_handler(client, address):
     print('Connection from', address)
-    while True:
-        data = await client.recv(1000)
-        if not data:
-            break
-        await client.send(b'GOT:' + data)
-    print('Connection closed')
+    try:
+        while True:
+            data = await client.recv(1000, IDLE_TIMEOUT)
+            if not data:
+                break
+            await client.send(b'GOT:' + data)
+        print('Connection closed')
+    except TimeoutError:
+        print('Connection timed out')
+    client.close()
 
 if __name__ == '__main__':
     tasks.append(tcp_server(('',25000), echo_handler))
@@ -0,0 +1,230 @@
+# bench.py
+#
+# Timing and memory benchmarks for structly.  Run a single benchmark
+# with  python bench.py <name>  or all of them with no arguments.
+
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from structly import *
+from structly.structure import Structure
+from structly.validate import PositiveInteger, PositiveFloat
+
+CTABUS = '../../Data/ctabus.csv'
+NROWS = 577563          # Number of rows in ctabus.csv
+
+class Ride(Structure):
+    route = String()
+    date = String()
+    daytype = String()
+    rides = Integer()
+
+def ride_rows(n=NROWS):
+    '''
+    Rows of bus ride data as lists of strings.  Uses Data/ctabus.csv if
+    it's been unpacked, otherwise fabricates rows of the same shape.
+    '''
+    if os.path.exists(CTABUS):
+        with open(CTABUS) as f:
+            rows = csv.reader(f)
+            next(rows)
+            return list(rows)[:n]
+    return [ [str(n % 180), '%02d/%02d/%d' % (n % 12 + 1, n % 28 + 1, 2001 + n % 11),
+              'UAW'[n % 3], str(n % 25000)] for n in range(n) ]
+
+def timeit(label, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print('%-40s %8.3fs' % (label, elapsed))
+    return elapsed
+
+def bench_from_row():
+    rows = ride_rows()
+    generic = Structure.from_row.__func__
+    t0 = timeit('generic from_row', lambda: [generic(Ride, row) for row in rows])
+    t1 = timeit('compiled from_row', lambda: [Ride.from_row(row) for row in rows])
+    print('speedup %.2fx' % (t0 / t1))
+
+class SlotStock(Structure, slots=True):
+    name = String()
+    shares = PositiveInteger()
+    price = PositiveFloat()
+
+    def sell(self, nshares: PositiveInteger):
+        self.shares -= nshares
+
+class HandStock:
+    # Hand-written slotted class, as in readrides_slots_class.py
+    __slots__ = ('name', 'shares', 'price')
+    def __init__(self, name, shares, price):
+        self.name = name
+        self.shares = shares
+        self.price = price
+
+def bench_slots(n=200000):
+    from stock import Stock
+    names = [ 'S%d' % (i % 1000) for i in range(n) ]
+    for cls in (Stock, SlotStock, HandStock):
+        tracemalloc.start()
+        portfolio = [ cls(name, 100, 32.2) for name in names ]
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('%-10s %6.1f bytes/record' % (cls.__name__, current / n))
+        del portfolio
+
+def bench_construct(n=200000):
+    from stock import Stock
+    for cls in (Stock, SlotStock):
+        t = timeit(f'{cls.__name__}() construction',
+                   lambda: [ cls('GOOG', 100, 490.1) for _ in range(n) ])
+        print('%42.0f per second' % (n / t))
+        s = cls('GOOG', n, 490.1)
+        t = timeit(f'{cls.__name__}.sell()', lambda: [ s.sell(1) for _ in range(n) ])
+        print('%42.0f per second' % (n / t))
+
+def bench_batch():
+    from structly import reader
+    with ride_file() as filename:
+        def by_row():
+            with open(filename) as f:
+                return reader.convert_csv(f, reader._instance_converter(Ride))
+        t0 = timeit('row at a time', by_row)
+        t1 = timeit('column checks (check_many)', read_csv_as_instances, filename, Ride)
+    print('speedup %.2fx' % (t0 / t1))
+
+def bench_check(n=1000000):
+    from stock import Stock
+    for validator in (PositiveInteger, PositiveFloat):
+        value = validator.expected_type(1)
+        check, flat = validator.check, validator._check
+        t0 = timeit(f'{validator.__name__}.check (super chain)',
+                    lambda: [ check(value) for _ in range(n) ])
+        t1 = timeit(f'{validator.__name__}._check (flattened)',
+                    lambda: [ flat(value) for _ in range(n) ])
+        print('speedup %.2fx' % (t0 / t1))
+    s = Stock('GOOG', 100, 490.1)
+    def setshares():
+        for _ in range(n):
+            s.shares = 100
+    timeit('Stock.shares = 100', setshares)
+
+@contextmanager
+def ride_file():
+    '''
+    Name of a CSV file of ride data (ctabus.csv or a temporary copy of
+    the fabricated rows, removed afterwards)
+    '''
+    if os.path.exists(CTABUS):
+        yield CTABUS
+        return
+    with tempfile.TemporaryDirectory() as dirname:
+        filename = os.path.join(dirname, 'rides.csv')
+        with open(filename, 'w', newline='') as f:
+            out = csv.writer(f)
+            out.writerow(Ride._fields)
+            out.writerows(ride_rows())
+        yield filename
+
+def bench_workers():
+    with ride_file() as filename:
+        t0 = timeit('read_csv_as_instances', read_csv_as_instances, filename, Ride)
+        for workers in (2, 4, os.cpu_count()):
+            t1 = timeit(f'read_csv_as_instances workers={workers}',
+                        lambda: read_csv_as_instances(filename, Ride, workers=workers))
+            print('speedup %.2fx' % (t0 / t1))
+
+def bench_tableformat(n=1000000):
+    from stock import Stock
+    portfolio = [ Stock('GOOG', 100, 490.1) ] * n
+    with open(os.devnull, 'w') as out:
+        for name in ('text', 'csv', 'html'):
+            # bufsize=0 writes each row as it's formatted, as print() did
+            t0 = timeit(f'{name} unbuffered', print_table, portfolio, ['name', 'shares', 'price'],
+                        create_formatter(name, file=out, bufsize=0))
+            t1 = timeit(f'{name} buffered', print_table, portfolio, ['name', 'shares', 'price'],
+                        create_formatter(name, file=out))
+            print('speedup %.2fx' % (t0 / t1))
+
+def bench_rows(n=500000):
+    from structly.tableformat.formatter import (TableFormatter, ColumnFormatMixin,
+                                                UpperHeadersMixin)
+    row = ['GOOG', 100, 490.1]
+    formats = ['"%s"', '%d', '%0.2f']
+    with open(os.devnull, 'w') as out:
+        for name in ('text', 'csv', 'html'):
+            create_formatter(name)
+            class Mixins(UpperHeadersMixin, ColumnFormatMixin, TableFormatter._formats[name]):
+                pass
+            Mixins.formats = formats
+            compiled = create_formatter(name, column_formats=formats, upper_headers=True, file=out)
+            for label, formatter in (('mixins', Mixins(out)), ('compiled', compiled)):
+                t = timeit(f'{name} {label}', lambda: [ formatter.row(row) for _ in range(n) ])
+                print('%42.0f rows/sec' % (n / t))
+
+class RideColumns:
+    # Minimal columnar source for print_table(): anything with column(name)
+    def __init__(self, rows):
+        self.data = dict(zip(Ride._fields, map(list, zip(*rows))))
+
+    def column(self, name):
+        return self.data[name]
+
+def bench_columns():
+    rows = ride_rows()
+    records = [ Ride.from_row(row) for row in rows ]
+    columns = RideColumns([ (r.route, r.date, r.daytype, r.rides) for r in records ])
+    with open(os.devnull, 'w') as out:
+        for name in ('text', 'csv', 'html'):
+            t0 = timeit(f'{name} from instances', print_table, records, Ride._fields,
+                        create_formatter(name, file=out))
+            t1 = timeit(f'{name} from columns', print_table, columns, Ride._fields,
+                        create_formatter(name, file=out))
+            print('speedup %.2fx' % (t0 / t1))
+
+def bench_table_workers():
+    records = [ Ride.from_row(row) for row in ride_rows() ] * 4
+    with open(os.devnull, 'w') as out:
+        for name in ('text', 'html'):
+            t0 = timeit(f'{name} {len(records)} rows', print_table, records, Ride._fields,
+                        create_formatter(name, file=out))
+            for workers in (2, 4, os.cpu_count()):
+                t1 = timeit(f'{name} workers={workers}',
+                            lambda: print_table(records, Ride._fields,
+                                                create_formatter(name, file=out), workers=workers))
+                print('speedup %.2fx' % (t0 / t1))
+
+def bench_importtime():
+    import subprocess
+    for code in ('import structly', 'from structly import Structure', 'from structly import *'):
+        out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             capture_output=True, text=True).stderr
+        # Total the self times of everything imported after site
+        lines = out.splitlines()
+        start = max(n for n, line in enumerate(lines) if line.endswith('| site'))
+        total = sum(int(line.split('|')[0].split(':')[1]) for line in lines[start+1:])
+        print('%-40s %6.1fms' % (code, total / 1000))
+
+benchmarks = {
+    'from_row': bench_from_row,
+    'workers': bench_workers,
+    'slots': bench_slots,
+    'construct': bench_construct,
+    'batch': bench_batch,
+    'check': bench_check,
+    'tableformat': bench_tableformat,
+    'rows': bench_rows,
+    'columns': bench_columns,
+    'table_workers': bench_table_workers,
+    'importtime': bench_importtime,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or benchmarks:
+        print(f'--- {name}')
+        benchmarks[name]()
@@ -1,9 +1,28 @@
 # structly/__init__.py
+#
+# The submodules are imported when one of their names is first used
+# (module __getattr__), so that  import structly  is cheap and a short
+# script only pays for the parts it uses.
 
-from .structure import *
-from .reader import *
-from .tableformat import *
+_exports = {
+    'Structure': 'structure',
+    'read_csv_as_dicts': 'reader',
+    'read_csv_as_instances': 'reader',
+    'iter_csv_as_dicts': 'reader',
+    'iter_csv_as_instances': 'reader',
+    'print_table': 'tableformat',
+    'create_formatter': 'tableformat',
+}
 
-__all__ = [ *structure.__all__,
-            *reader.__all__,
-            *tableformat.__all__ ]
+__all__ = list(_exports)
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    from importlib import import_module
+    value = getattr(import_module(f'.{_exports[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted([ *globals(), *_exports ])
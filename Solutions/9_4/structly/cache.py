@@ -0,0 +1,122 @@
+# cache.py
+#
+# Sidecar caches of converted CSV data.  The converted records for a file
+# are pickled next to it in a hidden file whose name includes a fingerprint
+# of the schema used to convert it and of the file itself (path, size,
+# mtime).  Changing either simply means a different sidecar, so stale
+# caches are never read; writing a new cache removes the stale ones for
+# the same schema.
+#
+#     python -m structly.cache warm Data/portfolio.csv --class stock:Stock
+#     python -m structly.cache warm Data/portfolio.csv --types str,int,float
+#     python -m structly.cache invalidate Data/portfolio.csv
+
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import sys
+
+log = logging.getLogger(__name__)
+
+def _name(obj):
+    '''
+    Importable name of obj.  Anything that can't be found again by its
+    name (lambdas, nested functions, partials) would make schemas that
+    differ look the same, so it can't be cached.
+    '''
+    qualname = getattr(obj, '__qualname__', None)
+    target = sys.modules.get(getattr(obj, '__module__', None))
+    for attr in (qualname or '').split('.'):
+        target = getattr(target, attr, None)
+    if qualname is None or target is not obj:
+        raise ValueError(f"cache can't be used with {obj!r}, which can't be imported by name")
+    return f'{obj.__module__}.{qualname}'
+
+def dict_schema(types, headers, columns):
+    return ('dicts', tuple(map(_name, types)), headers and tuple(headers),
+            columns and tuple(columns))
+
+def instance_schema(cls, headers, columns):
+    return ('instances', _name(cls), cls._fields, tuple(map(_name, cls._types)),
+            headers and tuple(headers), columns and tuple(columns))
+
+def _digest(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+def _sidecar_pattern(filename, schema='*'):
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    return os.path.join(dirname, f'.{basename}.{schema}.*.cache')
+
+def cache_filename(filename, schema):
+    '''
+    Name of the sidecar cache for filename converted according to schema
+    '''
+    path = os.path.abspath(filename)
+    st = os.stat(path)
+    pattern = _sidecar_pattern(filename, _digest(schema))
+    return pattern.replace('*', _digest((path, st.st_size, st.st_mtime_ns)))
+
+def cached(filename, schema, load):
+    '''
+    Return the records for filename from its sidecar cache if the file
+    and schema are unchanged.  Otherwise call load() and save the result.
+    '''
+    cachename = cache_filename(filename, schema)
+    try:
+        with open(cachename, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning('Ignoring unreadable cache %s: %s', cachename, e)
+
+    records = load()
+    invalidate(filename, schema)
+    tmpname = f'{cachename}.{os.getpid()}'
+    try:
+        with open(tmpname, 'wb') as f:
+            pickle.dump(records, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, cachename)
+    except OSError as e:
+        log.warning('Could not write cache %s: %s', cachename, e)
+    return records
+
+def invalidate(filename, schema=None):
+    '''
+    Remove the sidecar caches for filename (only those for schema if given)
+    '''
+    pattern = _sidecar_pattern(filename, '*' if schema is None else _digest(schema))
+    for cachename in glob.glob(pattern):
+        os.remove(cachename)
+
+def main(argv=None):
+    import argparse
+    import builtins
+    import importlib
+    from .reader import read_csv_as_dicts, read_csv_as_instances
+
+    parser = argparse.ArgumentParser(prog='python -m structly.cache')
+    parser.add_argument('action', choices=['warm', 'invalidate'])
+    parser.add_argument('filenames', nargs='+')
+    parser.add_argument('--class', dest='cls', metavar='MODULE:CLASS',
+                        help='Structure class to convert rows into')
+    parser.add_argument('--types', help='comma separated builtin types, e.g. str,int,float')
+    args = parser.parse_args(argv)
+
+    for filename in args.filenames:
+        if args.action == 'invalidate':
+            invalidate(filename)
+        elif args.cls:
+            modname, clsname = args.cls.split(':')
+            cls = getattr(importlib.import_module(modname), clsname)
+            read_csv_as_instances(filename, cls, cache=True)
+        elif args.types:
+            types = [ getattr(builtins, name) for name in args.types.split(',') ]
+            read_csv_as_dicts(filename, types, cache=True)
+        else:
+            parser.error('warm needs --class or --types')
+
+if __name__ == '__main__':
+    main()
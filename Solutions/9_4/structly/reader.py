@@ -1,43 +1,272 @@
 # reader.py
 
+__all__ = [ 'read_csv_as_dicts', 'read_csv_as_instances',
+            'iter_csv_as_dicts', 'iter_csv_as_instances' ]
+
 import csv
+import io
 import logging
+import os
+from functools import partial
+from itertools import repeat
 
 log = logging.getLogger(__name__)
 
-def convert_csv(lines, converter, *, headers=None):
+def _log_bad_row(rowno, row, reason):
+    log.warning('Row %s: Bad row: %s', rowno, row)
+    log.debug('Row %s: Reason: %s', rowno, reason)
+
+def _iter_numbered(lines, make_converter, headers, badrows=None):
+    # Generates (row number, row, record).  Rows that fail to convert are
+    # logged, or added to badrows if given for the caller to log later.
     rows = csv.reader(lines)
     if headers is None:
         headers = next(rows)
 
-    records = []
+    converter = make_converter(headers)
     for rowno, row in enumerate(rows, start=1):
         try:
-            records.append(converter(headers, row))
+            record = converter(row)
+            if record is not None:
+                yield rowno, row, record
+        except ValueError as e:
+            if badrows is None:
+                _log_bad_row(rowno, row, e)
+            else:
+                badrows.append((rowno, row, e))
+
+def iter_convert_csv(lines, make_converter, *, headers=None):
+    '''
+    Generator that converts CSV lines into records one at a time.
+    make_converter(headers) returns a function that turns a row into
+    a record, or into None if the row should be dropped.
+    '''
+    for rowno, row, record in _iter_numbered(lines, make_converter, headers):
+        yield record
+
+def convert_csv(lines, make_converter, *, headers=None):
+    return list(iter_convert_csv(lines, make_converter, headers=headers))
+
+def _where_tests(headers, types, where):
+    '''
+    Turn a where mapping of {column: predicate} into (index, func, predicate)
+    triples, where func is the column's type conversion
+    '''
+    tests = []
+    for name, predicate in (where or {}).items():
+        if name not in types:
+            raise ValueError(f'No type conversion for column {name!r}')
+        tests.append((headers.index(name), types[name], predicate))
+    return tests
+
+def _make_dict_converter(types, columns, where, headers):
+    if columns is None and where is None:
+        return lambda row: { name: func(val) for name, func, val in zip(headers, types, row) }
+
+    types = dict(zip(headers, types))
+    if columns is None:
+        columns = list(types)
+    fields = [ (name, headers.index(name), types[name]) for name in columns ]
+    tests = _where_tests(headers, types, where)
+
+    def convert(row):
+        for index, func, predicate in tests:
+            if not predicate(func(row[index])):
+                return None
+        return { name: func(row[index]) for name, index, func in fields }
+    return convert
+
+def _make_instance_converter(cls, columns, where, headers, values=False):
+    # With values=True rows are converted to tuples of values
+    # rather than to instances
+    make = cls._row_values if values else cls.from_row
+    if columns is None and where is None:
+        return make
+
+    if columns is None:
+        columns = headers[:len(cls._types)]
+    indices = [ headers.index(name) for name in columns ]
+    tests = _where_tests(headers, dict(zip(columns, cls._types)), where)
+
+    def convert(row):
+        for index, func, predicate in tests:
+            if not predicate(func(row[index])):
+                return None
+        return make([ row[index] for index in indices ])
+    return convert
+
+def _dict_converter(types, columns=None, where=None):
+    return partial(_make_dict_converter, types, columns, where)
+
+def _instance_converter(cls, columns=None, where=None):
+    return partial(_make_instance_converter, cls, columns, where)
+
+def csv_as_dicts(lines, types, *, headers=None, columns=None, where=None):
+    return convert_csv(lines, _dict_converter(types, columns, where), headers=headers)
+
+def csv_as_instances(lines, cls, *, headers=None, columns=None, where=None):
+    if not getattr(cls, '_validators', None):
+        return convert_csv(lines, _instance_converter(cls, columns, where), headers=headers)
+
+    # Structures are loaded a column at a time: rows are converted to tuples,
+    # each column is checked in one pass by its Validator.check_many(), and
+    # instances are then created without repeating the checks.  Bad rows,
+    # whether they failed conversion or validation, are logged in order.
+    make_converter = partial(_make_instance_converter, cls, columns, where, values=True)
+    badrows = []
+    numbered = list(_iter_numbered(lines, make_converter, headers, badrows))
+    records = [ values for rowno, row, values in numbered ]
+    bad = { }
+    for validator, column in zip(cls._validators, zip(*records)):
+        for n, e in validator.check_many(column).items():
+            bad.setdefault(n, e)
+    badrows.extend((numbered[n][0], numbered[n][1], e) for n, e in bad.items())
+    badrows.sort(key=lambda bad: bad[0])
+    for rowno, row, reason in badrows:
+        _log_bad_row(rowno, row, reason)
+    make = cls._make
+    return [ make(values) for n, values in enumerate(records) if n not in bad ]
+
+def _chunk_ranges(filename, start, nchunks):
+    '''
+    Split the bytes of filename from start onwards into nchunks
+    (start, end) ranges, each ending on a line boundary
+    '''
+    size = os.path.getsize(filename)
+    offsets = [start]
+    with open(filename, 'rb') as f:
+        for n in range(1, nchunks):
+            f.seek(max(start + (size - start) * n // nchunks, offsets[-1]))
+            f.readline()
+            offsets.append(min(f.tell(), size))
+    offsets.append(size)
+    return [ (lo, hi) for lo, hi in zip(offsets, offsets[1:]) if lo < hi ]
+
+def _convert_chunk(filename, start, end, make_converter, headers):
+    '''
+    Convert the rows in one byte range of a file (runs in a worker process).
+    Bad rows are returned rather than logged so that the parent can
+    report them with global row numbers.
+    '''
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    converter = make_converter(headers)
+    records = []
+    badrows = []
+    rowno = 0
+    for rowno, row in enumerate(csv.reader(io.TextIOWrapper(io.BytesIO(data))), start=1):
+        try:
+            record = converter(row)
+            if record is not None:
+                records.append(record)
         except ValueError as e:
-            log.warning('Row %s: Bad row: %s', rowno, row)
-            log.debug('Row %s: Reason: %s', rowno, row)
+            badrows.append((rowno, row, str(e)))
+    return records, rowno, badrows
+
+def _read_csv_parallel(filename, make_converter, headers, workers):
+    '''
+    Read a CSV file by converting line-aligned chunks of it in a pool
+    of worker processes.  Records come back in file order.  Note: this
+    assumes no quoted field contains a newline.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    start = 0
+    if headers is None:
+        with open(filename, 'rb') as f:
+            headers = next(csv.reader(io.TextIOWrapper(io.BytesIO(f.readline()))))
+            start = f.tell()
+
+    ranges = _chunk_ranges(filename, start, workers * 4)
+    records = []
+    rowno = 0
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_convert_chunk, repeat(filename),
+                           [ lo for lo, hi in ranges ], [ hi for lo, hi in ranges ],
+                           repeat(make_converter), repeat(headers))
+        for chunk, nrows, badrows in results:
+            for n, row, reason in badrows:
+                _log_bad_row(rowno + n, row, reason)
+            records.extend(chunk)
+            rowno += nrows
     return records
 
-def csv_as_dicts(lines, types, *, headers=None):
-    return convert_csv(lines, 
-                       lambda headers, row: { name: func(val) for name, func, val in zip(headers, types, row) })
+def _picklable(converter):
+    '''
+    Can converter be sent to worker processes?  It can't if the types or
+    where predicates include lambdas or nested functions.
+    '''
+    import pickle
+    try:
+        pickle.dumps(converter)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
 
-def csv_as_instances(lines, cls, *, headers=None):
-    return convert_csv(lines,
-                       lambda headers, row: cls.from_row(row))
+def _check_cacheable(where):
+    if where is not None:
+        raise ValueError("cache can't be combined with where")
 
-def read_csv_as_dicts(filename, types, *, headers=None):
+def read_csv_as_dicts(filename, types, *, headers=None, columns=None, where=None, workers=None,
+                      cache=False):
     '''
-    Read CSV data into a list of dictionaries with optional type conversion
+    Read CSV data into a list of dictionaries with optional type conversion.
+    columns limits the dictionaries (and the conversions) to the named
+    columns.  where maps column names to predicates on the converted value;
+    rows failing any predicate are dropped before a dictionary is built.
+    If workers is given, the file is converted in that many processes,
+    unless a type or predicate can't be pickled (a lambda, say), in which
+    case it's converted here as usual.
+    If cache is true, the result is saved to (and later reloaded from)
+    a sidecar cache file; see structly.cache.
     '''
+    if cache:
+        from . import cache as _cache
+        _check_cacheable(where)
+        return _cache.cached(filename, _cache.dict_schema(types, headers, columns),
+                             lambda: read_csv_as_dicts(filename, types, headers=headers,
+                                                       columns=columns, workers=workers))
+    converter = _dict_converter(types, columns, where)
+    if workers and workers > 1 and _picklable(converter):
+        return _read_csv_parallel(filename, converter, headers, workers)
     with open(filename) as file:
-        return csv_as_dicts(file, types, headers=headers)
+        return convert_csv(file, converter, headers=headers)
 
-def read_csv_as_instances(filename, cls, *, headers=None):
+def read_csv_as_instances(filename, cls, *, headers=None, columns=None, where=None, workers=None,
+                          cache=False):
     '''
-    Read CSV data into a list of instances
+    Read CSV data into a list of instances.  columns names the CSV columns
+    that supply the fields of cls, in order.  where maps column names to
+    predicates; rows failing any predicate are dropped before an instance
+    is created.  If workers is given, the file is converted in that many
+    processes, unless a predicate can't be pickled (a lambda, say), in
+    which case it's converted here as usual.  If cache is true, the result
+    is saved to (and later reloaded from) a sidecar cache file.
     '''
+    if cache:
+        from . import cache as _cache
+        _check_cacheable(where)
+        return _cache.cached(filename, _cache.instance_schema(cls, headers, columns),
+                             lambda: read_csv_as_instances(filename, cls, headers=headers,
+                                                           columns=columns, workers=workers))
+    converter = _instance_converter(cls, columns, where)
+    if workers and workers > 1 and _picklable(converter):
+        return _read_csv_parallel(filename, converter, headers, workers)
     with open(filename) as file:
-        return csv_as_instances(file, cls, headers=headers)
+        return csv_as_instances(file, cls, headers=headers, columns=columns, where=where)
 
+def iter_csv_as_dicts(filename, types, *, headers=None, columns=None, where=None):
+    '''
+    Lazily read CSV data as dictionaries, one row at a time.  The file
+    stays open until the generator is exhausted or closed.
+    '''
+    with open(filename) as file:
+        yield from iter_convert_csv(file, _dict_converter(types, columns, where), headers=headers)
+
+def iter_csv_as_instances(filename, cls, *, headers=None, columns=None, where=None):
+    '''
+    Lazily read CSV data as instances, one row at a time
+    '''
+    with open(filename) as file:
+        yield from iter_convert_csv(file, _instance_converter(cls, columns, where), headers=headers)
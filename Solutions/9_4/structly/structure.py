@@ -7,17 +7,38 @@ from collections import ChainMap
 
 class StructureMeta(type):
     @classmethod
-    def __prepare__(meta, clsname, bases):
+    def __prepare__(meta, clsname, bases, **kwargs):
         return ChainMap({}, Validator.validators)
         
     @staticmethod
-    def __new__(meta, name, bases, methods):
+    def __new__(meta, name, bases, methods, slots=False):
         methods = methods.maps[0]
-        return super().__new__(meta, name, bases, methods)
+        if not slots:
+            return super().__new__(meta, name, bases, methods)
+
+        # Give each validated field a private slot, named so as not to clash
+        # with attributes of Structure such as _types.  The field itself
+        # becomes a property that validates into that slot.  Since there's
+        # no __dict__, the slots already restrict which attributes can be
+        # set, so the checks in Structure.__setattr__ aren't needed.
+        validators = { name: val for name, val in methods.items()
+                       if isinstance(val, Validator) }
+        methods['__slots__'] = tuple('_slot_' + name for name in validators)
+        methods.setdefault('__setattr__', object.__setattr__)
+        cls = super().__new__(meta, name, bases, methods)
+        cls._slots = tuple(vars(cls)['_slot_' + name] for name in validators)
+        for slot, (name, validator) in zip(cls._slots, validators.items()):
+            setattr(cls, name, validator.slot_property(slot))
+        if cls._fields:
+            cls.create_make()
+        return cls
 
 class Structure(metaclass=StructureMeta):
+    __slots__ = ()
     _fields = ()
     _types = ()
+    _validators = ()
+    _slots = ()
 
     def __setattr__(self, name, value):
         if name.startswith('_') or name in self._fields:
@@ -54,6 +75,47 @@ class Structure(metaclass=StructureMeta):
         exec(code, locs)
         cls.__init__ = locs['__init__']
 
+    @classmethod
+    def create_from_row(cls):
+        '''
+        Create a from_row method specialised to _types.  Each column
+        is converted inline, avoiding the zip and list build of the
+        generic version on every row.
+        '''
+        args = ', '.join(f'_t{n}(row[{n}])' for n in range(len(cls._types)))
+        code = 'def from_row(cls, row):\n'
+        code += f'    return cls({args})\n'
+        code += 'def _row_values(row):\n'
+        code += f'    return ({args},)\n'
+        env = { f'_t{n}': func for n, func in enumerate(cls._types) }
+        exec(code, env)
+        cls.from_row = classmethod(env['from_row'])
+        cls._row_values = staticmethod(env['_row_values'])
+
+    @classmethod
+    def create_make(cls):
+        '''
+        Create a _make method that builds an instance from a sequence of
+        values that have already been validated (e.g. with
+        Validator.check_many) without checking them again
+        '''
+        args = ', '.join(cls._fields)
+        code = 'def _make(cls, values):\n'
+        code += '    self = _new(cls)\n'
+        code += f'    {args}, = values\n'
+        env = { '_new': object.__new__ }
+        if cls._slots:
+            for n, name in enumerate(cls._fields):
+                code += f'    _s{n}(self, {name})\n'
+                env[f'_s{n}'] = cls._slots[n].__set__
+        else:
+            code += '    d = self.__dict__\n'
+            for name in cls._fields:
+                code += f'    d[{name!r}] = {name}\n'
+        code += '    return self\n'
+        exec(code, env)
+        cls._make = classmethod(env['_make'])
+
     @classmethod
     def __init_subclass__(cls):
         # Apply the validated decorator to subclasses
@@ -70,10 +132,11 @@ def validate_attributes(cls):
             validators.append(val)
 
         # Apply validated decorator to any callable with annotations
-        elif callable(val) and val.__annotations__:
+        elif callable(val) and getattr(val, '__annotations__', None):
             setattr(cls, name, validated(val))
 
     # Collect all of the field names
+    cls._validators = tuple(validators)
     cls._fields = tuple([v.name for v in validators])
 
     # Collect type conversions. The lambda x:x is an identity
@@ -81,9 +144,11 @@ def validate_attributes(cls):
     cls._types = tuple([ getattr(v, 'expected_type', lambda x: x)
                    for v in validators ])
 
-    # Create the __init__ method
+    # Create the __init__ and from_row methods
     if cls._fields:
         cls.create_init()
+        cls.create_from_row()
+        cls.create_make()
 
     
     return cls
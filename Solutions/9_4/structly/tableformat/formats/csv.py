@@ -3,8 +3,10 @@
 from ..formatter import TableFormatter
 
 class CSVTableFormatter(TableFormatter):
+    row_layout = ('', '%s', ',', '\n')
+
     def headings(self, headers):
-        print(','.join(headers))
+        self.write(','.join(headers) + '\n')
 
     def row(self, rowdata):
-        print(','.join(str(d) for d in rowdata))
+        self.write(','.join(str(d) for d in rowdata) + '\n')
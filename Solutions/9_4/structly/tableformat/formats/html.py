@@ -3,14 +3,10 @@
 from ..formatter import TableFormatter
 
 class HTMLTableFormatter(TableFormatter):
+    row_layout = ('<tr> ', '<td>%s</td>', ' ', ' </tr>\n')
+
     def headings(self, headers):
-        print('<tr>', end=' ')
-        for h in headers:
-            print('<th>%s</th>' % h, end=' ')
-        print('</tr>')
+        self.write('<tr> ' + ''.join('<th>%s</th> ' % h for h in headers) + '</tr>\n')
 
     def row(self, rowdata):
-        print('<tr>', end=' ')
-        for d in rowdata:
-            print('<td>%s</td>' % d, end=' ')
-        print('</tr>')
+        self.write('<tr> ' + ''.join('<td>%s</td> ' % d for d in rowdata) + '</tr>\n')
@@ -3,9 +3,11 @@
 from ..formatter import TableFormatter
 
 class TextTableFormatter(TableFormatter):
+    row_layout = ('', '%10s', ' ', '\n')
+
     def headings(self, headers):
-        print(' '.join('%10s' % h for h in headers))
-        print(('-'*10 + ' ')*len(headers))
+        self.write(' '.join('%10s' % h for h in headers) + '\n')
+        self.write(('-'*10 + ' ')*len(headers) + '\n')
     
     def row(self, rowdata):
-        print(' '.join('%10s' % d for d in rowdata))
+        self.write(' '.join('%10s' % d for d in rowdata) + '\n')
@@ -3,7 +3,9 @@
 from ..formatter import TableFormatter
 
 class TSVTableFormatter(TableFormatter):
+    row_layout = ('', '%s', '\t', '\n')
+
     def headings(self, headers):
-        print('\t'.join(headers))
+        self.write('\t'.join(headers) + '\n')
     def row(self, rowdata):
-        print('\t'.join(str(d) for d in rowdata))
+        self.write('\t'.join(str(d) for d in rowdata) + '\n')
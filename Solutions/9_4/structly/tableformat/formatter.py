@@ -1,22 +1,101 @@
 # tableformat.py
+import io
+import sys
 from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
+from operator import attrgetter
 
-def print_table(records, fields, formatter):
+def print_table(records, fields, formatter, workers=None):
+    '''
+    Print a table of records (objects with the named fields as attributes,
+    or columnar data with a column(name) method).  If workers is given,
+    the rows are formatted in that many processes.
+    '''
     if not isinstance(formatter, TableFormatter):
         raise RuntimeError('Expected a TableFormatter')
 
     formatter.headings(fields)
-    for r in records:
-        rowdata = [getattr(r, fieldname) for fieldname in fields]
-        formatter.row(rowdata)
+    if workers and workers > 1:
+        _print_parallel(records, fields, formatter, workers)
+    elif hasattr(records, 'column'):
+        # Columnar data (e.g. colreader.DataCollection) is printed from its
+        # columns, without making an object or dict for each row
+        formatter.columns([ records.column(name) for name in fields ])
+    else:
+        for r in records:
+            rowdata = [getattr(r, fieldname) for fieldname in fields]
+            formatter.row(rowdata)
+    formatter.flush()
 
 class TableFormatter(ABC):
     _formats = { }
 
+    # Formats may describe their rows as (start, cell, separator, end)
+    # strings, e.g. ('', '%10s', ' ', '\n').  create_formatter() then
+    # renders each row with a single format operation (see compile_row).
+    row_layout = None
+
+    def __init__(self, file=None, bufsize=65536):
+        # Output is collected and written to file (sys.stdout if None) in
+        # blocks of about bufsize characters.  Call flush() to write out
+        # what's pending; print_table() does so when it's done.  With
+        # bufsize=0 each row is written as soon as it's formatted.
+        self.file = file
+        self.bufsize = bufsize
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.bufsize:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            file = self.file or sys.stdout
+            file.write(''.join(self._buffer))
+            file.flush()
+            self._buffer.clear()
+            self._buffered = 0
+
+    def columns(self, columndata, blocksize=10000):
+        '''
+        Output rows given as columns, one sequence of values per field.
+        With a row_layout each column is formatted in a single pass over
+        blocks of rows; otherwise row() is called for each row.
+        '''
+        layout = _row_layout(type(self))
+        if not layout:
+            for rowdata in zip(*columndata):
+                self.row(rowdata)
+            return
+
+        start, cell, sep, end = layout
+        column_formats = getattr(self, 'formats', None)
+        if column_formats:
+            # Columns beyond the formats are dropped, as by row()
+            columndata = list(columndata)[:len(column_formats)]
+        formats = cell_formats(cell, len(columndata), column_formats)
+        columns = [ iter(column) for column in columndata ]
+        while True:
+            cells = []
+            for (cellfmt, fmt), column in zip(formats, columns):
+                values = islice(column, blocksize)
+                if fmt:
+                    values = map(fmt.__mod__, values)
+                cells.append(list(map(cellfmt.__mod__, values)))
+            if not cells or not cells[0]:
+                break
+            self.write(start + (end + start).join(map(sep.join, zip(*cells))) + end)
+
     @classmethod
     def __init_subclass__(cls):
-        name = cls.__module__.split('.')[-1]
-        TableFormatter._formats[name] = cls
+        # Register the formats, not the classes create_formatter() composes
+        if cls.__module__ != __name__:
+            name = cls.__module__.split('.')[-1]
+            TableFormatter._formats[name] = cls
 
     @abstractmethod
     def headings(self, headers):
@@ -36,7 +115,118 @@ class UpperHeadersMixin:
     def headings(self, headers):
         super().headings([h.upper() for h in headers])
 
-def create_formatter(name, column_formats=None, upper_headers=False):
+def _row_layout(cls):
+    '''
+    cls.row_layout, provided it describes the row() that cls uses.  A class
+    that overrides row() without giving a layout of its own gets None.
+    '''
+    for c in cls.__mro__:
+        if c.__module__ != __name__ and 'row' in vars(c):
+            return vars(c).get('row_layout')
+    return None
+
+def _format_name(formatter):
+    '''
+    Name of the registered format that formatter is an instance of, or
+    None if its class adds anything beyond the mixins in this module
+    '''
+    for cls in type(formatter).__mro__:
+        if cls.__module__ != __name__:
+            # Worker processes load formats by name from the formats package
+            name = cls.__module__.split('.')[-1]
+            if (cls.__module__ == f'{__package__}.formats.{name}'
+                and TableFormatter._formats.get(name) is cls):
+                return name
+            return None
+
+def _format_chunk(name, column_formats, rows):
+    # Runs in a worker process: format rows as the named format would
+    out = io.StringIO()
+    formatter = create_formatter(name, column_formats=column_formats, file=out)
+    formatter.columns(list(zip(*rows)))
+    formatter.flush()
+    return out.getvalue()
+
+def _print_parallel(records, fields, formatter, workers, chunksize=20000):
+    '''
+    Format the rows of a table in chunks in a pool of worker processes,
+    writing the chunks to formatter's output in order
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    name = _format_name(formatter)
+    if name is None:
+        raise RuntimeError(f"{type(formatter).__name__} can't be used with workers")
+    column_formats = getattr(formatter, 'formats', None)
+    if hasattr(records, 'column'):
+        rows = zip(*[ records.column(fieldname) for fieldname in fields ])
+    elif len(fields) == 1:
+        rows = ((getattr(r, fields[0]),) for r in records)
+    else:
+        rows = map(attrgetter(*fields), records)
+
+    with ProcessPoolExecutor(workers) as pool:
+        # Keep a couple of chunks per worker in flight, not the whole table
+        pending = deque()
+        for chunk in iter(lambda: list(islice(rows, chunksize)), []):
+            pending.append(pool.submit(_format_chunk, name, column_formats, chunk))
+            if len(pending) >= 2 * workers:
+                formatter.write(pending.popleft().result())
+        while pending:
+            formatter.write(pending.popleft().result())
+
+def cell_formats(cell, ncolumns, column_formats=None):
+    '''
+    (cell format, value format) for each of ncolumns columns.  The value
+    format is None if there's none or it's been folded into the cell.
+    '''
+    formats = []
+    for n in range(ncolumns):
+        fmt = column_formats[n] if column_formats else None
+        if fmt and cell.count('%') == 1 and '%s' in cell:
+            # The column format can take the place of the cell's %s
+            formats.append((cell.replace('%s', fmt), None))
+        else:
+            formats.append((cell, fmt))
+    return formats
+
+def compile_row(formatter, ncolumns, column_formats=None, fallback=None):
+    '''
+    Make a row() function for formatter that renders rows of ncolumns
+    values (as many as there are column formats, if fewer) with one format
+    string built from its row_layout and the column formats.  Rows of any
+    other length are passed to fallback.
+    '''
+    start, cell, sep, end = formatter.row_layout
+    ncells = min(ncolumns, len(column_formats)) if column_formats else ncolumns
+    formats = cell_formats(cell, ncells, column_formats)
+    template = start + sep.join(cellfmt for cellfmt, fmt in formats) + end
+    args = [ f'{fmt!r} % row[{n}]' if fmt else f'row[{n}]'
+             for n, (cellfmt, fmt) in enumerate(formats) ]
+    code = 'def row(row):\n'
+    if fallback:
+        code += f'    if len(row) != {ncolumns}:\n        return fallback(row)\n'
+    code += f'    write({template!r} % ({", ".join(args)},))\n'
+    locs = { 'write': formatter.write, 'fallback': fallback }
+    exec(code, locs)
+    return locs['row']
+
+class CompiledRowMixin:
+    formats = None
+    def row(self, rowdata):
+        self._compiled_row(rowdata)
+
+    def _compiled_row(self, rowdata):
+        # Compiled for each number of columns the first time it's seen.
+        # A compiled row() hands rows of other lengths back to here.
+        compiled = vars(self).setdefault('_compiled', {})
+        ncolumns = len(rowdata)
+        if ncolumns not in compiled:
+            compiled[ncolumns] = compile_row(self, ncolumns, self.formats, self._compiled_row)
+        self.row = compiled[ncolumns]
+        self.row(rowdata)
+
+def create_formatter(name, column_formats=None, upper_headers=False, file=None, bufsize=65536):
     if name not in TableFormatter._formats:
         __import__(f'{__package__}.formats.{name}')
         
@@ -44,7 +234,11 @@ def create_formatter(name, column_formats=None, upper_headers=False):
     if not formatter_cls:
         raise RuntimeError('Unknown format %s' % name)
 
-    if column_formats:
+    if _row_layout(formatter_cls):
+        class formatter_cls(CompiledRowMixin, formatter_cls):
+              formats = column_formats
+
+    elif column_formats:
         class formatter_cls(ColumnFormatMixin, formatter_cls):
               formats = column_formats
 
@@ -52,7 +246,4 @@ def create_formatter(name, column_formats=None, upper_headers=False):
         class formatter_cls(UpperHeadersMixin, formatter_cls):
             pass
 
-    return formatter_cls()
-
-
-
+    return formatter_cls(file, bufsize)
@@ -11,14 +11,80 @@ class Validator:
     def check(cls, value):
         return value
 
+    # Source for the body of check(), used to build the flattened _check()
+    # below.  A class defining check() should define _check_code to match.
+    _check_code = ''
+
+    @staticmethod
+    def _check(value):
+        return value
+
+    @classmethod
+    def create_check(cls):
+        '''
+        Flatten the chain of cooperative check() methods in the MRO into
+        a single generated _check() function.  If some class's check()
+        has no _check_code, _check() just calls check().
+        '''
+        code = 'def _check(value):\n'
+        for c in cls.__mro__:
+            if 'check' in vars(c):
+                if '_check_code' not in vars(c):
+                    cls._check = staticmethod(cls.check)
+                    return
+                code += vars(c)['_check_code']
+        code += '    return value\n'
+        env = { 'cls': cls }
+        exec(code, env)
+        cls._check = staticmethod(env['_check'])
+
+    @classmethod
+    def check_many(cls, values):
+        '''
+        Check a whole sequence of values in one pass.  Returns a dict
+        mapping the index of each bad value to the exception that check()
+        would have raised for it (empty if all the values are good).
+        '''
+        errors = { }
+        # A class that only knows how to check single values forces
+        # the value-at-a-time fallback
+        if any('check' in vars(c) and '_check_many' not in vars(c) for c in cls.__mro__):
+            for n, value in enumerate(values):
+                try:
+                    cls.check(value)
+                except (TypeError, ValueError) as e:
+                    errors[n] = e
+        else:
+            cls._check_many(values, errors)
+        return errors
+
+    @classmethod
+    def _check_many(cls, values, errors):
+        # Cooperative batch version of check(). Each class adds the
+        # failures it finds to errors, skipping values that have
+        # already failed an earlier check.
+        pass
+
     def __set__(self, instance, value):
-        instance.__dict__[self.name] = self.check(value)
+        instance.__dict__[self.name] = self._check(value)
+
+    def slot_property(self, slot):
+        '''
+        Make a property that validates values like this descriptor but
+        stores them in slot (the member descriptor of a __slots__ entry).
+        Reading goes straight to the slot.
+        '''
+        check = self._check
+        def setter(instance, value):
+            slot.__set__(instance, check(value))
+        return property(slot.__get__, setter)
 
     # Collect all derived classes into a dict
     validators = { }
     @classmethod
     def __init_subclass__(cls):
         cls.validators[cls.__name__] = cls
+        cls.create_check()
 
 class Typed(Validator):
     expected_type = object
@@ -28,6 +94,20 @@ class Typed(Validator):
             raise TypeError(f'expected {cls.expected_type}')
         return super().check(value)
 
+    _check_code = '''
+    if not isinstance(value, cls.expected_type):
+        raise TypeError(f'expected {cls.expected_type}')
+'''
+
+    @classmethod
+    def _check_many(cls, values, errors):
+        expected = cls.expected_type
+        if not all(issubclass(ty, expected) for ty in set(map(type, values))):
+            for n, value in enumerate(values):
+                if n not in errors and not isinstance(value, expected):
+                    errors[n] = TypeError(f'expected {expected}')
+        super()._check_many(values, errors)
+
 _typed_classes = [
     ('Integer', int),
     ('Float', float),
@@ -43,6 +123,27 @@ class Positive(Validator):
             raise ValueError('must be >= 0')
         return super().check(value)
 
+    _check_code = '''
+    if value < 0:
+        raise ValueError('must be >= 0')
+'''
+
+    @classmethod
+    def _check_many(cls, values, errors):
+        try:
+            good = not errors and min(values, default=0) >= 0
+        except TypeError:
+            good = False
+        if not good:
+            for n, value in enumerate(values):
+                if n not in errors:
+                    try:
+                        if value < 0:
+                            errors[n] = ValueError('must be >= 0')
+                    except TypeError as e:
+                        errors[n] = e
+        super()._check_many(values, errors)
+
 class NonEmpty(Validator):
     @classmethod
     def check(cls, value):
@@ -50,6 +151,27 @@ class NonEmpty(Validator):
             raise ValueError('must be non-empty')
         return super().check(value)
 
+    _check_code = '''
+    if len(value) == 0:
+        raise ValueError('must be non-empty')
+'''
+
+    @classmethod
+    def _check_many(cls, values, errors):
+        try:
+            good = not errors and min(map(len, values), default=1) > 0
+        except TypeError:
+            good = False
+        if not good:
+            for n, value in enumerate(values):
+                if n not in errors:
+                    try:
+                        if len(value) == 0:
+                            errors[n] = ValueError('must be non-empty')
+                    except TypeError as e:
+                        errors[n] = e
+        super()._check_many(values, errors)
+
 class PositiveInteger(Integer, Positive):
     pass
 
@@ -59,13 +181,13 @@ class PositiveFloat(Float, Positive):
 class NonEmptyString(String, NonEmpty):
     pass
 
-from inspect import signature
 from functools import wraps
 
 def isvalidator(item):
     return isinstance(item, type) and issubclass(item, Validator)
 
 def validated(func):
+    from inspect import signature      # Slow to import; only needed here
     sig = signature(func)
 
     # Gather the function annotations
@@ -83,7 +205,7 @@ def validated(func):
         # Enforce argument checks
         for name, validator in annotations.items():
             try:
-                validator.check(bound.arguments[name])
+                validator._check(bound.arguments[name])
             except Exception as e:
                 errors.append(f'  {name}: {e}')
 
@@ -95,7 +217,7 @@ def validated(func):
         # Enforce return check (if any)
         if retcheck:
             try:
-                retcheck.check(result)
+                retcheck._check(result)
             except Exception as e:
                 raise TypeError(f'Bad return: {e}') from None
         return result
@@ -106,6 +228,7 @@ def enforce(**annotations):
     retcheck = annotations.pop('return_', None)
 
     def decorate(func):
+        from inspect import signature
         sig = signature(func)
 
         @wraps(func)
@@ -116,7 +239,7 @@ def enforce(**annotations):
             # Enforce argument checks
             for name, validator in annotations.items():
                 try:
-                    validator.check(bound.arguments[name])
+                    validator._check(bound.arguments[name])
                 except Exception as e:
                     errors.append(f'    {name}: {e}')
 
@@ -127,7 +250,7 @@ def enforce(**annotations):
 
             if retcheck:
                 try:
-                    retcheck.check(result)
+                    retcheck._check(result)
                 except Exception as e:
                     raise TypeError(f'Bad return: {e}') from None
             return result
@@ -0,0 +1,46 @@
+# testimport.py
+
+import os
+import subprocess
+import sys
+import unittest
+import structly
+
+# Budget for the cumulative time of  import structly  as reported by
+# python -X importtime.  It takes about 2ms; the eager version took ~80ms.
+IMPORT_BUDGET_US = 20000
+
+def python(code, *options):
+    return subprocess.run([sys.executable, *options, '-c', code], capture_output=True,
+                          text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+class TestLazyImport(unittest.TestCase):
+    def test_nothing_loaded(self):
+        out = python('import sys, structly\n'
+                     'print(sorted(m for m in sys.modules if m.startswith("structly.")\n'
+                     '             or m in ("csv", "logging", "inspect", "concurrent.futures")))')
+        self.assertEqual(out.stdout.strip(), '[]')
+
+    def test_loaded_on_use(self):
+        out = python('import sys, structly\n'
+                     'structly.Structure\n'
+                     'print("structly.structure" in sys.modules, "structly.reader" in sys.modules)')
+        self.assertEqual(out.stdout.split(), ['True', 'False'])
+
+    def test_exports(self):
+        from structly import structure, reader, tableformat
+        self.assertEqual(sorted(structly.__all__),
+                         sorted([ *structure.__all__, *reader.__all__, *tableformat.__all__ ]))
+        self.assertIs(structly.read_csv_as_dicts, reader.read_csv_as_dicts)
+        self.assertIn('print_table', dir(structly))
+        with self.assertRaises(AttributeError):
+            structly.read_csv
+
+    def test_import_time(self):
+        out = python('import structly', '-X', 'importtime')
+        times = [ line.split('|') for line in out.stderr.splitlines() ]
+        cumulative = [ int(t[1]) for t in times if len(t) == 3 and t[2].strip() == 'structly' ]
+        self.assertLess(cumulative[0], IMPORT_BUDGET_US)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+# testreader.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from structly import *
+from structly import reader
+from stock import Stock
+
+DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'Data')
+
+def datafile(name):
+    return os.path.join(DATA, name)
+
+class TestIterReader(unittest.TestCase):
+    def test_iter_dicts_matches_list(self):
+        types = [str, int, float]
+        rows = iter_csv_as_dicts(datafile('portfolio.csv'), types)
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual(list(rows), read_csv_as_dicts(datafile('portfolio.csv'), types))
+
+    def test_iter_instances_is_lazy(self):
+        rows = iter_csv_as_instances(datafile('portfolio.csv'), Stock)
+        first = next(rows)
+        self.assertEqual(first, Stock('AA', 100, 32.2))
+        self.assertEqual(len(list(rows)), 6)
+
+    def test_iter_bad_rows_logged(self):
+        with self.assertLogs(reader.log, 'WARNING') as cm:
+            rows = list(iter_csv_as_dicts(datafile('missing.csv'), [str, int, float]))
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(len(cm.output), 8)
+        self.assertIn('Row 4', cm.output[0])
+
+class TestBatchValidation(unittest.TestCase):
+    lines = ['name,shares,price', 'AA,100,32.2', 'IBM,-50,91.1', ',10,1.0', 'GE,10,-1.0']
+
+    def test_bad_values_dropped(self):
+        from structly.validate import NonEmptyString
+        class NStock(Stock):
+            name = NonEmptyString()
+            shares = PositiveInteger()
+            price = PositiveFloat()
+        with self.assertLogs(reader.log, 'WARNING') as cm:
+            rows = reader.csv_as_instances(self.lines, NStock)
+        self.assertEqual(rows, [NStock('AA', 100, 32.2)])
+        self.assertEqual([ line.split(':')[2] for line in cm.output ],
+                         ['Row 2', 'Row 3', 'Row 4'])
+
+    def test_bad_rows_in_order(self):
+        with self.assertLogs(reader.log, 'WARNING') as cm:
+            rows = reader.csv_as_instances(['name,shares,price', 'AA,-1,1.0', 'BB,x,1.0',
+                                            'CC,1,-2.0', 'DD,1,1.0'], Stock)
+        self.assertEqual(rows, [Stock('DD', 1, 1.0)])
+        self.assertEqual([ line.split(':', 2)[2] for line in cm.output ],
+                         ["Row 1: Bad row: ['AA', '-1', '1.0']",
+                          "Row 2: Bad row: ['BB', 'x', '1.0']",
+                          "Row 3: Bad row: ['CC', '1', '-2.0']"])
+
+    def test_instances_are_checked_once(self):
+        rows = reader.csv_as_instances(self.lines[:2], Stock)
+        self.assertEqual(rows, [Stock('AA', 100, 32.2)])
+        with self.assertRaises(ValueError):
+            rows[0].shares = -1
+
+    def test_empty(self):
+        self.assertEqual(reader.csv_as_instances(self.lines[:1], Stock), [])
+
+class TestProjection(unittest.TestCase):
+    def test_dict_columns(self):
+        rows = read_csv_as_dicts(datafile('portfolio.csv'), [str, int, float],
+                                 columns=['price', 'name'])
+        self.assertEqual(rows[0], {'price': 32.2, 'name': 'AA'})
+
+    def test_dict_columns_not_converted(self):
+        rows = read_csv_as_dicts(datafile('missing.csv'), [str, int, float],
+                                 columns=['name', 'price'])
+        self.assertEqual(len(rows), 27)    # only 'N/A' prices are bad rows
+
+    def test_dict_where(self):
+        rows = read_csv_as_dicts(datafile('portfolio.csv'), [str, int, float],
+                                 where={'shares': lambda n: n >= 100})
+        self.assertEqual([r['name'] for r in rows], ['AA', 'CAT', 'MSFT', 'IBM'])
+
+    def test_instance_where(self):
+        rows = read_csv_as_instances(datafile('portfolio.csv'), Stock,
+                                     where={'name': lambda n: n == 'IBM'})
+        self.assertEqual(rows, [Stock('IBM', 50, 91.1), Stock('IBM', 100, 70.44)])
+
+    def test_instance_columns(self):
+        rows = read_csv_as_instances(datafile('portfolio.csv'), Stock,
+                                     columns=['name', 'shares', 'price'],
+                                     where={'price': lambda p: p > 80})
+        self.assertEqual(rows, [Stock('IBM', 50, 91.1), Stock('CAT', 150, 83.44)])
+
+    def test_where_unknown_column(self):
+        with self.assertRaises(ValueError):
+            read_csv_as_instances(datafile('portfolio.csv'), Stock,
+                                  columns=['name', 'shares', 'price'],
+                                  where={'date': bool})
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'portfolio.csv')
+        shutil.copy(datafile('portfolio.csv'), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def sidecars(self):
+        return [ name for name in os.listdir(self.tmpdir) if name.endswith('.cache') ]
+
+    def test_cache_roundtrip(self):
+        first = read_csv_as_instances(self.filename, Stock, cache=True)
+        self.assertEqual(len(self.sidecars()), 1)
+        self.assertEqual(read_csv_as_instances(self.filename, Stock, cache=True), first)
+
+    def test_cache_per_schema(self):
+        read_csv_as_instances(self.filename, Stock, cache=True)
+        rows = read_csv_as_dicts(self.filename, [str, int, float], cache=True)
+        self.assertEqual(rows[0], {'name': 'AA', 'shares': 100, 'price': 32.2})
+        self.assertEqual(len(self.sidecars()), 2)
+
+    def test_cache_stale_on_change(self):
+        read_csv_as_dicts(self.filename, [str, int, float], cache=True)
+        with open(self.filename, 'a') as f:
+            f.write('"HPQ",10,20.5\n')
+        rows = read_csv_as_dicts(self.filename, [str, int, float], cache=True)
+        self.assertEqual(rows[-1]['name'], 'HPQ')
+        self.assertEqual(len(self.sidecars()), 1)
+
+    def test_cache_needs_named_converters(self):
+        thousands = lambda s: int(s) * 1000
+        with self.assertRaises(ValueError):
+            read_csv_as_dicts(self.filename, [str, thousands, float], cache=True)
+        self.assertEqual(self.sidecars(), [])
+        rows = read_csv_as_dicts(self.filename, [str, thousands, float])
+        self.assertEqual(rows[0]['shares'], 100000)
+
+    def test_cache_invalidate(self):
+        from structly import cache
+        read_csv_as_instances(self.filename, Stock, cache=True)
+        cache.main(['invalidate', self.filename])
+        self.assertEqual(self.sidecars(), [])
+
+class TestParallelReader(unittest.TestCase):
+    def test_workers_same_result(self):
+        types = [str, int, float]
+        serial = read_csv_as_dicts(datafile('missing.csv'), types)
+        self.assertEqual(read_csv_as_dicts(datafile('missing.csv'), types, workers=3), serial)
+
+    def test_workers_instances(self):
+        serial = read_csv_as_instances(datafile('portfolio.csv'), Stock)
+        parallel = read_csv_as_instances(datafile('portfolio.csv'), Stock, workers=2)
+        self.assertEqual(parallel, serial)
+
+    def test_workers_lambda_where(self):
+        # Lambdas can't go to worker processes, so these are read serially
+        where = {'shares': lambda n: n >= 100}
+        self.assertEqual(read_csv_as_dicts(datafile('portfolio.csv'), [str, int, float],
+                                           where=where, workers=2),
+                         read_csv_as_dicts(datafile('portfolio.csv'), [str, int, float],
+                                           where=where))
+        where = {'price': lambda p: p > 80}
+        self.assertEqual(read_csv_as_instances(datafile('portfolio.csv'), Stock,
+                                               where=where, workers=2),
+                         read_csv_as_instances(datafile('portfolio.csv'), Stock, where=where))
+        types = [str, lambda s: int(s) * 1000, float]
+        self.assertEqual(read_csv_as_dicts(datafile('portfolio.csv'), types, workers=2)[0],
+                         {'name': 'AA', 'shares': 100000, 'price': 32.2})
+
+    def test_workers_global_rownos(self):
+        with self.assertLogs(reader.log, 'WARNING') as serial:
+            read_csv_as_dicts(datafile('missing.csv'), [str, int, float])
+        with self.assertLogs(reader.log, 'WARNING') as parallel:
+            read_csv_as_dicts(datafile('missing.csv'), [str, int, float], workers=3)
+        self.assertEqual(parallel.output, serial.output)
+
+if __name__ == '__main__':
+    unittest.main()
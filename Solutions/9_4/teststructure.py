@@ -0,0 +1,78 @@
+# teststructure.py
+
+import unittest
+from structly import *
+from structly.structure import Structure
+from stock import Stock
+
+class TestFromRow(unittest.TestCase):
+    def test_from_row(self):
+        s = Stock.from_row(['GOOG', '100', '490.1'])
+        self.assertEqual(s, Stock('GOOG', 100, 490.1))
+
+    def test_from_row_is_specialised(self):
+        self.assertIsNot(Stock.from_row.__func__, Structure.from_row.__func__)
+
+    def test_from_row_bad_value(self):
+        with self.assertRaises(ValueError):
+            Stock.from_row(['GOOG', 'N/A', '490.1'])
+
+    def test_from_row_ignores_extra_columns(self):
+        s = Stock.from_row(['GOOG', '100', '490.1', 'extra'])
+        self.assertEqual(s.price, 490.1)
+
+class SlotStock(Structure, slots=True):
+    name = String()
+    shares = PositiveInteger()
+    price = PositiveFloat()
+
+    def sell(self, nshares: PositiveInteger):
+        self.shares -= nshares
+
+class TestSlots(unittest.TestCase):
+    def test_no_dict(self):
+        s = SlotStock('GOOG', 100, 490.1)
+        self.assertFalse(hasattr(s, '__dict__'))
+        self.assertEqual(SlotStock._fields, ('name', 'shares', 'price'))
+
+    def test_validation(self):
+        s = SlotStock('GOOG', 100, 490.1)
+        s.sell(25)
+        self.assertEqual(s.shares, 75)
+        with self.assertRaises(ValueError):
+            s.shares = -1
+        with self.assertRaises(TypeError):
+            s.price = '1.0'
+        with self.assertRaises(AttributeError):
+            s.share = 10
+
+    def test_no_python_setattr(self):
+        self.assertIs(SlotStock.__setattr__, object.__setattr__)
+        s = SlotStock('GOOG', 100, 490.1)
+        with self.assertRaises(AttributeError):
+            s._share = 10
+
+    def test_from_row(self):
+        self.assertEqual(SlotStock.from_row(['GOOG', '100', '490.1']),
+                         SlotStock('GOOG', 100, 490.1))
+
+    def test_field_names(self):
+        # Fields whose slot would otherwise shadow Structure's own attributes
+        class Odd(Structure, slots=True):
+            types = String()
+            fields = PositiveInteger()
+            make = String()
+        o = Odd('a', 1, 'b')
+        self.assertEqual((o.types, o.fields, o.make), ('a', 1, 'b'))
+        self.assertEqual(Odd._fields, ('types', 'fields', 'make'))
+        self.assertEqual(Odd._make(['c', 2, 'd']), Odd('c', 2, 'd'))
+        with self.assertRaises(ValueError):
+            o.fields = -1
+
+    def test_pickle(self):
+        import pickle
+        s = SlotStock('GOOG', 100, 490.1)
+        self.assertEqual(pickle.loads(pickle.dumps(s)), s)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# testtableformat.py
+
+import io
+import unittest
+from contextlib import redirect_stdout
+from structly import *
+from stock import Stock
+
+portfolio = [ Stock('AA', 100, 32.2), Stock('IBM', 50, 91.1) ]
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+class TestFormats(unittest.TestCase):
+    expected = {
+        'text': ('      name     shares      price\n'
+                 '---------- ---------- ---------- \n'
+                 '        AA        100       32.2\n'
+                 '       IBM         50       91.1\n'),
+        'csv': 'name,shares,price\nAA,100,32.2\nIBM,50,91.1\n',
+        'tsv': 'name\tshares\tprice\nAA\t100\t32.2\nIBM\t50\t91.1\n',
+        'html': ('<tr> <th>name</th> <th>shares</th> <th>price</th> </tr>\n'
+                 '<tr> <td>AA</td> <td>100</td> <td>32.2</td> </tr>\n'
+                 '<tr> <td>IBM</td> <td>50</td> <td>91.1</td> </tr>\n'),
+    }
+
+    def test_stdout(self):
+        for name, expected in self.expected.items():
+            out = io.StringIO()
+            with redirect_stdout(out):
+                print_table(portfolio, ['name', 'shares', 'price'], create_formatter(name))
+            self.assertEqual(out.getvalue(), expected)
+
+    def test_file(self):
+        for name, expected in self.expected.items():
+            out = io.StringIO()
+            print_table(portfolio, ['name', 'shares', 'price'], create_formatter(name, file=out))
+            self.assertEqual(out.getvalue(), expected)
+
+    def test_column_formats(self):
+        out = io.StringIO()
+        formatter = create_formatter('csv', column_formats=['"%s"', '%d', '%0.2f'],
+                                     upper_headers=True, file=out)
+        print_table(portfolio, ['name', 'shares', 'price'], formatter)
+        self.assertEqual(out.getvalue(), 'NAME,SHARES,PRICE\n"AA",100,32.20\n"IBM",50,91.10\n')
+
+class TestCompiledRows(unittest.TestCase):
+    def test_same_as_mixins(self):
+        from structly.tableformat.formatter import TableFormatter, ColumnFormatMixin
+        formats = ['"%s"', '%d', '%0.2f']
+        for name in ('text', 'csv', 'tsv', 'html'):
+            create_formatter(name)          # Make sure the format is loaded
+            class Mixed(ColumnFormatMixin, TableFormatter._formats[name]):
+                pass
+            Mixed.formats = formats
+            for column_formats, old in ((None, TableFormatter._formats[name]), (formats, Mixed)):
+                expected = io.StringIO()
+                print_table(portfolio, ['name', 'shares', 'price'], old(expected))
+                out = io.StringIO()
+                print_table(portfolio, ['name', 'shares', 'price'],
+                            create_formatter(name, column_formats=column_formats, file=out))
+                self.assertEqual(out.getvalue(), expected.getvalue())
+
+    def test_row_override(self):
+        from structly.tableformat.formatter import TableFormatter
+        create_formatter('csv')
+        class Reversed(TableFormatter._formats['csv']):
+            def row(self, rowdata):
+                super().row(list(reversed(rowdata)))
+        TableFormatter._formats['reversed'] = Reversed
+        try:
+            out = io.StringIO()
+            print_table(portfolio, ['name', 'shares'], create_formatter('reversed', file=out))
+            self.assertEqual(out.getvalue(), 'name,shares\n100,AA\n50,IBM\n')
+        finally:
+            del TableFormatter._formats['reversed']
+
+    def test_compiled(self):
+        formatter = create_formatter('text', column_formats=['%s', '%d', '%0.2f'],
+                                     file=io.StringIO())
+        formatter.row(['AA', 100, 32.2])
+        self.assertIn('row', vars(formatter))
+
+    def test_row_lengths(self):
+        rows = [['a', 'b'], ['x', 'y', 'z'], ['p'], ['c', 'd']]
+        out = io.StringIO()
+        formatter = create_formatter('csv', file=out)
+        for rowdata in rows:
+            formatter.row(rowdata)
+        formatter.flush()
+        self.assertEqual(out.getvalue(), 'a,b\nx,y,z\np\nc,d\n')
+
+        out = io.StringIO()
+        formatter = create_formatter('csv', column_formats=['<%s>', '[%s]'], file=out)
+        for rowdata in rows:
+            formatter.row(rowdata)
+        formatter.flush()
+        self.assertEqual(out.getvalue(), '<a>,[b]\n<x>,[y]\n<p>\n<c>,[d]\n')
+
+class Columns:
+    def __init__(self, records, fields):
+        self.data = { name: [ getattr(r, name) for r in records ] for name in fields }
+
+    def column(self, name):
+        return self.data[name]
+
+class TestColumns(unittest.TestCase):
+    def test_same_as_rows(self):
+        fields = ['name', 'shares', 'price']
+        records = portfolio * 7
+        for name in ('text', 'csv', 'tsv', 'html'):
+            for column_formats in (None, ['"%s"', '%d', '%0.2f'], ['"%s"', '%d']):
+                expected = io.StringIO()
+                print_table(records, fields,
+                            create_formatter(name, column_formats=column_formats, file=expected))
+                out = io.StringIO()
+                formatter = create_formatter(name, column_formats=column_formats, file=out)
+                formatter.headings(fields)
+                formatter.columns([ Columns(records, fields).column(f) for f in fields ],
+                                  blocksize=3)
+                formatter.flush()
+                self.assertEqual(out.getvalue(), expected.getvalue())
+
+    def test_print_table(self):
+        out = io.StringIO()
+        print_table(Columns(portfolio, ['name', 'price']), ['price', 'name'],
+                    create_formatter('csv', file=out))
+        self.assertEqual(out.getvalue(), 'price,name\n32.2,AA\n91.1,IBM\n')
+
+class TestParallel(unittest.TestCase):
+    def test_same_as_serial(self):
+        fields = ['name', 'shares', 'price']
+        records = portfolio * 25000      # More than one chunk
+        for name in ('text', 'html'):
+            expected = io.StringIO()
+            print_table(records, fields, create_formatter(name, upper_headers=True, file=expected))
+            out = io.StringIO()
+            print_table(records, fields, create_formatter(name, upper_headers=True, file=out),
+                        workers=2)
+            self.assertEqual(out.getvalue(), expected.getvalue())
+
+    def test_columns(self):
+        out = io.StringIO()
+        print_table(Columns(portfolio, ['name', 'price']), ['price', 'name'],
+                    create_formatter('csv', file=out), workers=2)
+        self.assertEqual(out.getvalue(), 'price,name\n32.2,AA\n91.1,IBM\n')
+
+    def test_custom_formatter(self):
+        from structly.tableformat.formatter import TableFormatter
+        create_formatter('csv')
+        class Custom(TableFormatter._formats['csv']):
+            def row(self, rowdata):
+                super().row(list(reversed(rowdata)))
+        with self.assertRaises(RuntimeError):
+            print_table(portfolio, ['name'], Custom(io.StringIO()), workers=2)
+
+class TestBuffering(unittest.TestCase):
+    def test_block_writes(self):
+        out = CountingStream()
+        print_table(portfolio * 50000, ['name', 'shares', 'price'],
+                    create_formatter('csv', file=out))
+        self.assertEqual(out.getvalue().count('\n'), 100001)
+        self.assertLess(out.writes, 50)
+
+    def test_unbuffered(self):
+        out = CountingStream()
+        formatter = create_formatter('csv', file=out, bufsize=0)
+        formatter.headings(['name', 'shares', 'price'])
+        formatter.row(['AA', 100, 32.2])
+        self.assertEqual(out.getvalue(), 'name,shares,price\nAA,100,32.2\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# testvalidate.py
+
+import unittest
+from array import array
+from structly.validate import *
+
+class TestCheckMany(unittest.TestCase):
+    def test_all_good(self):
+        self.assertEqual(PositiveInteger.check_many([1, 2, 3]), {})
+        self.assertEqual(PositiveFloat.check_many(array('d', [1.0, 2.5])), {})
+
+    def test_reports_every_index(self):
+        errors = PositiveInteger.check_many([1, -2, 'x', 3.0, -4])
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIsInstance(errors[1], ValueError)
+        self.assertIsInstance(errors[2], TypeError)
+
+    def test_first_failure_wins(self):
+        # 'x' fails the type check and never reaches Positive
+        errors = PositiveInteger.check_many(['x'])
+        self.assertIsInstance(errors[0], TypeError)
+
+    def test_nonempty(self):
+        errors = NonEmptyString.check_many(['a', '', 3])
+        self.assertIsInstance(errors[1], ValueError)
+        self.assertIsInstance(errors[2], TypeError)
+
+    def test_custom_check_fallback(self):
+        class Even(Integer):
+            @classmethod
+            def check(cls, value):
+                if value % 2:
+                    raise ValueError('must be even')
+                return super().check(value)
+        self.assertEqual(sorted(Even.check_many([2, 3, 4, 5])), [1, 3])
+
+class TestFlattenedCheck(unittest.TestCase):
+    def test_same_as_check(self):
+        for validator in (PositiveInteger, PositiveFloat, NonEmptyString):
+            for value in (1, 2.5, -1, -2.5, 'x', '', None):
+                try:
+                    expected = validator.check(value)
+                except Exception as e:
+                    with self.assertRaises(type(e)):
+                        validator._check(value)
+                else:
+                    self.assertEqual(validator._check(value), expected)
+
+    def test_custom_check_not_flattened(self):
+        class Even(Integer):
+            @classmethod
+            def check(cls, value):
+                if value % 2:
+                    raise ValueError('must be even')
+                return super().check(value)
+        self.assertEqual(Even._check(4), 4)
+        with self.assertRaises(ValueError):
+            Even._check(3)
+
+if __name__ == '__main__':
+    unittest.main()
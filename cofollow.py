@@ -1,16 +1,39 @@
-import os
-import time
+from follow import follow_batches, follow_chunks, follow_batches_async
 
 # Data source
-def follow(filename,target):
-    with open(filename,'r') as f:
-        f.seek(0,os.SEEK_END)
-        while True:
-            line = f.readline()
-            if line != '':
-                target.send(line)
-            else:
-                time.sleep(0.1)
+def follow(filename,target,idle=None):
+    '''
+    Send each line written to the end of a file to target.  If idle is
+    given, None is sent too when nothing has been written for a while
+    (at most idle seconds), for targets such as batcher() that need to
+    know that time has passed.
+    '''
+    for lines in follow_batches(filename, idle=idle):
+        if not lines:
+            target.send(None)
+        for line in lines:
+            target.send(line)
+
+def follow_batched(filename,target):
+    '''
+    Like follow(), but sends each batch of newly written lines as a list
+    '''
+    for lines in follow_batches(filename):
+        target.send(lines)
+
+def follow_bytes(filename,target):
+    '''
+    Like follow(), but sends the raw bytes written, in chunks of any size
+    '''
+    for chunk in follow_chunks(filename):
+        target.send(chunk)
+
+# asyncio data source.  An async generator, so that one event loop
+# can follow many files at once.
+async def afollow(filename):
+    async for lines in follow_batches_async(filename):
+        for line in lines:
+            yield line
 
 # Decorator for coroutine functions
 from functools import wraps
@@ -23,6 +46,38 @@ def consumer(func):
         return f
     return start
 
+import time
+
+@consumer
+def batcher(target, size=100, window=0.1):
+    '''
+    Group items sent one at a time into lists for a batch-oriented target.
+    A batch is sent once it holds size items, or once window seconds have
+    passed since its first item.  The batcher only sees time pass when
+    something is sent to it, so a source that can go quiet should send
+    None now and then (as follow(filename, target, idle=window) does);
+    None only flushes a batch whose window is up.  Anything pending is
+    sent when the batcher is closed.
+    '''
+    batch = []
+    try:
+        while True:
+            item = yield
+            if item is None:
+                if batch and time.monotonic() >= deadline:
+                    target.send(batch)
+                    batch = []
+                continue
+            if not batch:
+                deadline = time.monotonic() + window
+            batch.append(item)
+            if len(batch) >= size or time.monotonic() >= deadline:
+                target.send(batch)
+                batch = []
+    except GeneratorExit:
+        if batch:
+            target.send(batch)
+
 # Sample coroutine
 @consumer
 def printer():
@@ -12,21 +12,130 @@ class Ticker(Structure):
     low = Float("low")
     volume = Integer("volume")
 
-from cofollow import consumer, follow
+from cofollow import consumer, follow, follow_batched, follow_bytes, batcher, afollow
 from tableformat import create_formatter
+import codecs
+import collections
 import csv
+import io
+import itertools
+
+class CSVDecoder:
+    '''
+    Incremental CSV parser.  feed() takes chunks of bytes (or of text)
+    of any size and returns the rows completed by them.  A row is only
+    parsed once its terminating newline has arrived, so quoted fields
+    spanning chunks, or containing newlines, come out whole.
+    feed_lines() takes a list of lines instead, as csv.reader() would.
+    '''
+    def __init__(self, encoding='utf-8', **fmtparams):
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.fmtparams = fmtparams
+        self.strict = dict(fmtparams, strict=True)
+        self.pending = ''
+        # A reader for rows taken one at a time, pulling lines from a
+        # deque.  If a row is still open when the deque runs dry,
+        # popleft() raises IndexError out of the reader and the row's
+        # lines are kept to be parsed again once more data has arrived.
+        self.lines = collections.deque()
+        self.reader = csv.reader(map(collections.deque.popleft, itertools.repeat(self.lines)),
+                                 **fmtparams)
+
+    def feed(self, data):
+        if isinstance(data, bytes):
+            data = self.decoder.decode(data)
+        if self.pending:
+            data = self.pending + data
+        # Only the text up to the last newline can hold complete rows
+        end = data.rfind('\n') + 1
+        self.pending = data[end:]
+        if not end:
+            return []
+        if data.find('\n') + 1 == end:
+            # A single line, as when feeding lines one at a time
+            return self._parse([data[:end]])
+        # Only '\n' ends a line; str.splitlines() would also split on
+        # characters such as '\x0c' and '\u2028' inside fields
+        return self._parse(io.StringIO(data[:end]).readlines())
+
+    def feed_lines(self, lines):
+        '''
+        Like feed(), but for a list of lines, such as follow_batched()
+        sends.  Each is taken to be a whole line.
+        '''
+        if self.pending and lines:
+            # The held back part of a row is taken as the start of the
+            # first line
+            lines = [self.pending + lines[0], *lines[1:]]
+            self.pending = ''
+        return self._parse(lines)
+
+    def _parse(self, lines):
+        if len(lines) > 1:
+            # Parse them all in one go.  In strict mode the reader raises
+            # an error, rather than making up a row, if they end inside a
+            # quoted field (or the quoting is off).  Then the rows are
+            # taken one at a time instead.
+            try:
+                return list(csv.reader(lines, **self.strict))
+            except csv.Error:
+                pass
+        self.lines.extend(lines)
+        rows = []
+        try:
+            while self.lines:
+                nlines = len(self.lines)
+                rows.append(next(self.reader))
+        except IndexError:
+            self.pending = ''.join(lines[-nlines:]) + self.pending
+        return rows
+
+    def close(self):
+        '''
+        Return the rows in anything left over (a last line with no newline,
+        or a quoted field that was never closed)
+        '''
+        text = self.pending + self.decoder.decode(b'', final=True)
+        self.pending = ''
+        lines = [ line + '\n' for line in text.split('\n') ]
+        lines[-1] = lines[-1][:-1]
+        return list(csv.reader(filter(None, lines), **self.fmtparams))
 
-# This one is tricky. See solution for notes about it
 @consumer
-def to_csv(target):
-    def producer():
+def decode_csv(target, encoding='utf-8'):
+    '''
+    Receive chunks of CSV bytes, of any size, and send the parsed rows
+    '''
+    decoder = CSVDecoder(encoding)
+    try:
         while True:
-            yield line
+            for row in decoder.feed((yield)):
+                target.send(row)
+    except GeneratorExit:
+        for row in decoder.close():
+            target.send(row)
 
-    reader = csv.reader(producer())
+@consumer
+def to_csv(target):
+    decoder = CSVDecoder()
+    lines, reader = decoder.lines, decoder.reader
+    append, send = lines.append, target.send
     while True:
         line = yield
-        target.send(next(reader))
+        # Each line goes straight to the reader, as with csv.reader(f)
+        append(line)
+        try:
+            send(next(reader))
+            continue
+        except IndexError as e:
+            if e.__traceback__.tb_next:
+                raise           # Raised by target, not by the reader
+        # A quoted field carries on.  Lines go through the decoder until
+        # the row is complete.
+        decoder.pending = line
+        while decoder.pending:
+            for row in decoder.feed_lines([(yield)]):
+                send(row)
 
 @consumer
 def create_ticker(target):
@@ -49,9 +158,176 @@ def ticker(fmt, fields):
         rec = yield
         row = [getattr(rec, name) for name in fields]
         formatter.row(row) # formatter.row does the printing
+        formatter.flush()
+
+# Batch versions of the stages.  Each send() carries a list of items,
+# so the cost of resuming a generator is paid once per batch rather than
+# once per record.  Feed them from follow_batched(), or put a batcher()
+# in front to group single items.  That only pays off where the per-item
+# work is small: in the full pipeline building validated Tickers costs
+# far more than resuming generators, and batching gains about 10%.
+
+@consumer
+def to_csv_batch(target):
+    decoder = CSVDecoder()
+    while True:
+        lines = yield
+        rows = decoder.feed_lines(lines)
+        if rows:
+            target.send(rows)
+
+@consumer
+def create_ticker_batch(target):
+    from_row = Ticker.from_row
+    while True:
+        rows = yield
+        target.send([from_row(row) for row in rows])
+
+@consumer
+def negchange_batch(target):
+    while True:
+        records = yield
+        records = [rec for rec in records if rec.change < 0]
+        if records:
+            target.send(records)
+
+@consumer
+def ticker_batch(fmt, fields):
+    formatter = create_formatter(fmt)
+    formatter.headings(fields)
+    while True:
+        records = yield
+        for rec in records:
+            formatter.row([getattr(rec, name) for name in fields])
+        formatter.flush()
+
+def bench_batches(nlines=100000):
+    '''
+    Push nlines lines of stock data through the per-item stages and, in
+    batches of several sizes (as sent by follow_batched), through the
+    batch stages.  Both CSV parsing alone and the whole pipeline are timed,
+    as is the cost of grouping single items with batcher().
+    '''
+    import time
+
+    with open('Data/stocklog.csv') as f:
+        lines = list(itertools.islice(itertools.cycle(f.readlines()), nlines))
+
+    @consumer
+    def count():
+        while True:
+            yield
+
+    def run(label, pipeline, items, base=None):
+        start = time.perf_counter()
+        for item in items:
+            pipeline.send(item)
+        pipeline.close()
+        elapsed = time.perf_counter() - start
+        print('%-24s %9.0f lines/sec' % (label, nlines / elapsed), end='')
+        print('  %0.2fx' % (base / elapsed) if base else '')
+        return elapsed
+
+    def batches(size):
+        return [ lines[n:n+size] for n in range(0, nlines, size) ]
+
+    base = run('to_csv', to_csv(count()), lines)
+    for size in (10, 100, 1000):
+        run(f'to_csv_batch {size}', to_csv_batch(count()), batches(size), base)
+    data = ''.join(lines).encode()
+    for size in (4096, 65536):
+        run(f'decode_csv {size}B chunks', decode_csv(count()),
+            [ data[n:n+size] for n in range(0, len(data), size) ], base)
+
+    base = run('pipeline', to_csv(create_ticker(negchange(count()))), lines)
+    for size in (10, 100, 1000):
+        run(f'pipeline batch {size}', to_csv_batch(create_ticker_batch(negchange_batch(count()))),
+            batches(size), base)
+
+    run('batcher 100', batcher(count(), 100), lines)
+
+# asyncio versions of the pipeline stages.  Each is an async generator
+# consuming the stage before it, e.g.
+#
+#     await aticker('text', fields, anegchange(acreate_ticker(ato_csv(afollow(filename)))))
+#
+# so a single event loop can run a pipeline for each of many files.
+
+async def ato_csv(lines):
+    decoder = CSVDecoder()
+    async for line in lines:
+        for row in decoder.feed_lines([line]):
+            yield row
+    for row in decoder.close():
+        yield row
+
+async def acreate_ticker(rows):
+    async for row in rows:
+        yield Ticker.from_row(row)
+
+async def anegchange(records):
+    async for record in records:
+        if record.change < 0:
+            yield record
+
+async def aticker(fmt, fields, records):
+    formatter = create_formatter(fmt)
+    formatter.headings(fields)
+    async for rec in records:
+        row = [getattr(rec, name) for name in fields]
+        formatter.row(row)
+        formatter.flush()
+
+async def bench(nfiles=100, nlines=2000, batch=50):
+    '''
+    Follow nfiles files concurrently while nlines lines of stock data
+    are appended to each, and report events (lines) per second
+    '''
+    import asyncio
+    import tempfile
+    import time
+
+    with open('Data/stocklog.csv') as f:
+        sample = list(itertools.islice(f, batch))
+    tmpdir = tempfile.TemporaryDirectory()
+    filenames = [ f'{tmpdir.name}/stocklog{n}.csv' for n in range(nfiles) ]
+    for filename in filenames:
+        open(filename, 'w').close()
+
+    received = 0
+    async def count(filename):
+        nonlocal received
+        async for rec in acreate_ticker(ato_csv(afollow(filename))):
+            received += 1
+
+    tasks = [ asyncio.create_task(count(filename)) for filename in filenames ]
+    await asyncio.sleep(0.1)          # Let every follower get going
+    start = time.perf_counter()
+    for _ in range(nlines // batch):
+        for filename in filenames:
+            with open(filename, 'a') as f:
+                f.writelines(sample)
+        await asyncio.sleep(0)
+    while received < nfiles * (nlines // batch) * batch:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tmpdir.cleanup()
+    print('%d files, %d events in %0.3fs: %0.0f events/sec' %
+          (nfiles, received, elapsed, received / elapsed))
 
 if __name__ == "__main__":
-    # last = ticker('csv', ["name", "price", "date", "time", "change",
-    last = ticker('text', Ticker._fields)
+    import sys
+    if sys.argv[1:2] == ['bench_batches']:
+        bench_batches()
+    elif sys.argv[1:2] == ['bench']:
+        # python coticker.py bench [nfiles [nlines]]
+        import asyncio
+        asyncio.run(bench(*map(int, sys.argv[2:])))
+    else:
+        # last = ticker('csv', ["name", "price", "date", "time", "change",
+        last = ticker('text', Ticker._fields)
 
-    follow('Data/stocklog.csv', to_csv(create_ticker(negchange(last))) )
+        follow('Data/stocklog.csv', to_csv(create_ticker(negchange(last))) )
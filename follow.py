@@ -1,19 +1,300 @@
+import asyncio
+import collections
 import os
+import select
+import struct
+import threading
 import time
 
+# Waiting for a file to grow. On Linux we block on inotify, watching the
+# file's directory so that rotation (the file being replaced) also wakes us
+# up. Elsewhere, or if inotify can't be set up, we poll with a delay that
+# backs off while the file is idle and resets as soon as data arrives.
+# Followers in the same event loop (or thread) share one inotify instance.
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+IN_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_event = struct.Struct('iIII')    # wd, mask, cookie, len (then the name)
+
+class Inotify:
+    '''
+    An inotify instance shared by all the InotifyWaiters of an event loop
+    (or, waiting synchronously, of a thread).  Each directory is watched
+    once and events are routed to the waiters by file name, so N files
+    cost one fd and one wakeup per event rather than N of each.
+    '''
+    _instances = {}     # event loop or thread -> Inotify
+
+    @classmethod
+    def get(cls):
+        try:
+            owner = asyncio.get_running_loop()
+        except RuntimeError:
+            owner = threading.current_thread()
+        inotify = cls._instances.get(owner)
+        if inotify is None:
+            inotify = cls._instances[owner] = cls(owner)
+        return inotify
+
+    def __init__(self, owner):
+        import ctypes
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.owner = owner
+        self.watches = {}       # dirname -> watch descriptor
+        self.waiters = {}       # (wd, name) -> set of waiters
+        self.nwaiters = collections.Counter()     # wd -> number of waiters
+        if isinstance(owner, asyncio.AbstractEventLoop):
+            owner.add_reader(self.fd, self.read_events)
+
+    def add(self, waiter, dirname):
+        wd = self.watches.get(dirname)
+        if wd is None:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirname), IN_MASK)
+            if wd < 0:
+                import ctypes
+                errno = ctypes.get_errno()
+                if not self.watches:
+                    self.close()
+                raise OSError(errno, 'inotify_add_watch failed')
+            self.watches[dirname] = wd
+        self.nwaiters[wd] += 1
+        self.waiters.setdefault((wd, waiter.name), set()).add(waiter)
+        return wd
+
+    def remove(self, waiter, dirname):
+        wd = self.watches[dirname]
+        waiters = self.waiters[wd, waiter.name]
+        waiters.discard(waiter)
+        if not waiters:
+            del self.waiters[wd, waiter.name]
+        self.nwaiters[wd] -= 1
+        if not self.nwaiters[wd]:
+            del self.nwaiters[wd], self.watches[dirname]
+            self.libc.inotify_rm_watch(self.fd, wd)
+        if not self.watches:
+            self.close()
+
+    def read_events(self):
+        '''
+        Drain pending events, waking the waiters of the files concerned
+        '''
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, namelen = _event.unpack_from(data, offset)
+            offset += _event.size
+            name = os.fsdecode(data[offset:offset+namelen].rstrip(b'\0'))
+            offset += namelen
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so any file might have changed
+                for waiters in list(self.waiters.values()):
+                    for waiter in waiters:
+                        waiter.wake()
+            for waiter in self.waiters.get((wd, name), ()):
+                waiter.wake()
+
+    def close(self):
+        if isinstance(self.owner, asyncio.AbstractEventLoop) and not self.owner.is_closed():
+            self.owner.remove_reader(self.fd)
+        os.close(self.fd)
+        del Inotify._instances[self.owner]
+
+class InotifyWaiter:
+    def __init__(self, filename):
+        self.dirname, self.name = os.path.split(os.path.abspath(filename))
+        self.changed = False        # Set by Inotify when the file changes
+        self.future = None          # What wait_async() is waiting on
+        self.inotify = Inotify.get()
+        self.inotify.add(self, self.dirname)
+
+    def wake(self):
+        self.changed = True
+        if self.future and not self.future.done():
+            self.future.set_result(None)
+
+    def wait(self, timeout=1.0):
+        '''
+        Block until something happens to the file (or timeout seconds pass)
+        '''
+        fd = self.inotify.fd
+        while not self.changed and select.select([fd], [], [], timeout)[0]:
+            self.inotify.read_events()
+        self.changed = False
+
+    async def wait_async(self, timeout=1.0):
+        '''
+        Like wait(), but lets the event loop run other tasks meanwhile
+        '''
+        if not self.changed:
+            loop = asyncio.get_running_loop()
+            future = self.future = loop.create_future()
+            # Not asyncio.wait_for(), which can swallow a cancellation
+            # arriving just as the future is done
+            timer = loop.call_later(timeout, lambda: future.done() or future.set_result(None))
+            try:
+                await future
+            finally:
+                timer.cancel()
+                self.future = None
+        self.changed = False
+
+    def got_data(self):
+        pass
+
+    def close(self):
+        self.inotify.remove(self, self.dirname)
+
+class PollWaiter:
+    def __init__(self, filename, mindelay=0.005, maxdelay=0.5):
+        self.mindelay = mindelay
+        self.maxdelay = maxdelay
+        self.delay = mindelay
+
+    def wait(self, timeout=None):
+        time.sleep(self.delay if timeout is None else min(self.delay, timeout))
+        self.delay = min(self.delay * 2, self.maxdelay)
+
+    async def wait_async(self):
+        await asyncio.sleep(self.delay)
+        self.delay = min(self.delay * 2, self.maxdelay)
+
+    def got_data(self):
+        self.delay = self.mindelay
+
+    def close(self):
+        pass
+
+def make_waiter(filename):
+    try:
+        return InotifyWaiter(filename)
+    except (OSError, AttributeError):
+        return PollWaiter(filename)
+
+class Tail:
+    '''
+    The end of a file being followed.  Handles partial lines, truncation
+    and replacement of the file (log rotation).
+    '''
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        self.file.seek(0, os.SEEK_END)
+        self.partial = b''
+
+    def read(self):
+        '''
+        Return the bytes added since the last call (possibly none)
+        '''
+        data = self.file.read()
+        if not data and self._reopen():
+            data = self.file.read()
+        return data
+
+    def read_lines(self):
+        '''
+        Return the complete lines added since the last call (possibly none).
+        Everything appended is read with a single read().
+        '''
+        lines = (self.partial + self.read()).split(b'\n')
+        self.partial = lines.pop()
+        return [ line.decode() + '\n' for line in lines ]
+
+    def _reopen(self):
+        # If the file was truncated, start again at its beginning.  If it
+        # was replaced, the old one has been read to the end so switch to
+        # the new one.  Returns True if either happened.
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return False         # Mid-rotation: wait for the new file
+        if st.st_ino != os.fstat(self.file.fileno()).st_ino:
+            self.file.close()
+            self.file = open(self.filename, 'rb')
+        elif st.st_size < self.file.tell():
+            self.file.seek(0)
+        else:
+            return False
+        self.partial = b''
+        return True
+
+    def close(self):
+        self.file.close()
+
+def _follow(filename, read, waiter, idle=None):
+    if waiter is None:
+        waiter = make_waiter(filename)
+    tail = Tail(filename)
+    try:
+        while True:
+            data = read(tail)
+            if data:
+                waiter.got_data()
+                yield data
+            elif idle is None:
+                waiter.wait()
+            else:
+                yield data          # Nothing new, at least every idle seconds
+                waiter.wait(idle)
+    finally:
+        tail.close()
+        waiter.close()
+
+def follow_batches(filename, *, waiter=None, idle=None):
+    '''
+    Generator that produces lists of the lines written at the end of a file.
+    If idle is given, an empty list is also produced whenever there's
+    nothing new, and at least every idle seconds while the file is quiet.
+    '''
+    return _follow(filename, Tail.read_lines, waiter, idle)
+
+def follow_chunks(filename, *, waiter=None):
+    '''
+    Generator that produces the bytes written at the end of a file, as
+    they're read: chunks of any size, not necessarily whole lines
+    '''
+    return _follow(filename, Tail.read, waiter)
+
+async def follow_batches_async(filename, *, waiter=None):
+    '''
+    Asynchronous generator version of follow_batches()
+    '''
+    if waiter is None:
+        waiter = make_waiter(filename)
+    tail = Tail(filename)
+    try:
+        while True:
+            lines = tail.read_lines()
+            if lines:
+                waiter.got_data()
+                yield lines
+            else:
+                await waiter.wait_async()
+    finally:
+        tail.close()
+        waiter.close()
+
 def follow(filename):
     '''
     Generator that produces a sequence of lines being written at the end of a file.
     '''
     try:
-        with open(filename,'r') as f:
-            f.seek(0,os.SEEK_END)
-            while True:
-                 line = f.readline()
-                 if line == '':
-                     time.sleep(0.1)    # Sleep briefly to avoid busy wait
-                     continue
-                 yield line
+        for lines in follow_batches(filename):
+            yield from lines
     except GeneratorExit:
         print('Following Done')
 
@@ -0,0 +1,92 @@
+# loadtest.py
+#
+# Load test for the echo servers built on the task scheduler in server.py
+# (or the async/await version in Solutions/8_6/asyncserver.py).  Starts
+# the server in a child process, opens many concurrent connections to it
+# and has each of them exchange messages, reporting connections and
+# messages per second.
+#
+#     python loadtest.py [--module server] [--connections 10000] [--messages 10]
+#     PYTHONPATH=Solutions/8_6 python loadtest.py --module asyncserver
+
+import argparse
+import asyncio
+import importlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+def raise_fd_limit():
+    '''
+    Allow as many open files (sockets) as the hard limit permits
+    '''
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+def serve(modname, port):
+    raise_fd_limit()
+    sys.stdout = open(os.devnull, 'w')      # Handlers print every connection
+    module = importlib.import_module(modname)
+    module.tasks.append(module.tcp_server(('127.0.0.1', port), module.echo_handler))
+    module.run()
+
+async def connect(port, retries=50):
+    for _ in range(retries):
+        try:
+            return await asyncio.open_connection('127.0.0.1', port)
+        except ConnectionRefusedError:
+            await asyncio.sleep(0.1)
+    raise ConnectionRefusedError(f'Nothing listening on port {port}')
+
+async def exchange(reader, writer, nmessages, message=b'x' * 64):
+    for _ in range(nmessages):
+        writer.write(message)
+        await reader.readexactly(len(message) + 4)     # b'GOT:' + message
+
+async def loadtest(port, nconnections, nmessages, batch=500):
+    reader, writer = await connect(port)          # Wait for the server to start
+    writer.close()
+
+    start = time.perf_counter()
+    connections = []
+    for n in range(0, nconnections, batch):
+        connections += await asyncio.gather(
+            *[ connect(port) for _ in range(min(batch, nconnections - n)) ])
+    elapsed = time.perf_counter() - start
+    print('%d connections in %0.2fs: %0.0f connections/sec' %
+          (nconnections, elapsed, nconnections / elapsed))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[ exchange(reader, writer, nmessages)
+                            for reader, writer in connections ])
+    elapsed = time.perf_counter() - start
+    total = nconnections * nmessages
+    print('%d messages in %0.2fs: %0.0f messages/sec' % (total, elapsed, total / elapsed))
+
+    for reader, writer in connections:
+        writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python loadtest.py')
+    parser.add_argument('--module', default='server',
+                        help='module providing tasks, run(), tcp_server() and echo_handler()')
+    parser.add_argument('--port', type=int, default=25000)
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    limit = raise_fd_limit()
+    if args.connections > limit - 100:
+        parser.error(f'at most {limit - 100} connections (open file limit {limit})')
+    server = multiprocessing.Process(target=serve, args=(args.module, args.port), daemon=True)
+    server.start()
+    try:
+        asyncio.run(loadtest(args.port, args.connections, args.messages))
+    finally:
+        server.terminate()
+
+if __name__ == '__main__':
+    main()
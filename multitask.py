@@ -1,15 +1,42 @@
 from collections import deque
+from types import coroutine
+import heapq
+import itertools
+import time
 
 tasks = deque()
+sleeping = []      # Heap of (deadline, sequence number, task)
+_sequence = itertools.count()
+
 def run():
-    while tasks:
+    while tasks or sleeping:
+        if sleeping:
+            if not tasks:
+                time.sleep(max(0, sleeping[0][0] - time.monotonic()))
+            now = time.monotonic()
+            while sleeping and sleeping[0][0] <= now:
+                tasks.append(heapq.heappop(sleeping)[2])
+            if not tasks:
+                continue
         task = tasks.popleft()
         try:
-            task.send(None)
-            tasks.append(task)
+            request = task.send(None)
+            if request is None:
+                tasks.append(task)
+            elif request[0] == 'sleep':
+                heapq.heappush(sleeping, (time.monotonic() + request[1], next(_sequence), task))
+            else:
+                raise RuntimeError('Unknown request %r' % (request,))
         except StopIteration:
             print('Task done')
 
+# A task sleeps with  yield 'sleep', seconds  (or  await sleep(seconds)
+# in an async def task).  Sleeping tasks sit in the heap and cost nothing
+# until they're due.
+@coroutine
+def sleep(seconds):
+    yield 'sleep', seconds
+
 
 def countdown(n):
     while n > 0:
@@ -22,20 +22,23 @@
 # ```
 
 import csv
+import os
 
 from abc import ABC, abstractmethod
 
 class CSVParser(ABC):
 
     def parse(self, filename):
-        records = []
+        return list(self.iter_parse(filename))
+
+    def iter_parse(self, filename):
+        # generator version of parse: yields one record at a time so
+        # that huge files never have to sit in memory as a list
         with open(filename) as f:
             rows = csv.reader(f)
             headers = next(rows)
             for row in rows:
-                record = self.make_record(headers, row)
-                records.append(record)
-        return records
+                yield self.make_record(headers, row)
 
     @abstractmethod
     def make_record(self, headers, row):
@@ -84,3 +87,62 @@ def read_csv_as_instances(filename, cls):
             records.append(parser.make_record(headers, row))
     return records
 
+
+# Memory-mapped reading of selected columns. The file is scanned as bytes
+# on an mmap buffer and only the requested fields are ever decoded (int()
+# and float() accept bytes directly, so numeric fields aren't decoded at
+# all). This only understands simple CSV: quotes around a field are
+# stripped, but quoted fields can't contain the separator or newlines.
+
+import mmap
+
+def _bytes_converter(func):
+    if func in (int, float):
+        return lambda field: func(field.strip(b'"'))
+    if func is str:
+        return lambda field: field.strip(b'"').decode()
+    return lambda field: func(field.strip(b'"').decode())
+
+def _make_row_converter(indices, types):
+    # Generate a function that converts just the wanted fields, so there's
+    # no per-field loop (same exec trick as Structure.create_init)
+    args = ''.join(f'_c{n}(fields[{index}]), ' for n, index in enumerate(indices))
+    code = f'def convert(fields):\n    return ({args})\n'
+    env = { f'_c{n}': _bytes_converter(func) for n, func in enumerate(types) }
+    exec(code, env)
+    return env['convert']
+
+def iter_mmap_rows(filename, indices, types, sep=b',', skip=0):
+    '''
+    Generator producing tuples of the fields at positions indices (converted
+    with the matching functions in types) from each line of filename after
+    the first skip lines. sep=None splits on whitespace, as for the .dat files.
+    '''
+    convert = _make_row_converter(indices, types)
+    maxsplit = max(indices) + 1
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for _ in range(skip):
+                buf.readline()
+            for line in iter(buf.readline, b''):
+                fields = line.rstrip(b'\r\n').split(sep, maxsplit)
+                if fields != [b'']:
+                    yield convert(fields)
+
+def read_csv_as_dicts_mmap(filename, casting_functions, columns=None):
+    '''
+    Like read_csv_as_dicts, but only the named columns are decoded and
+    converted (all of them if columns is None)
+    '''
+    with open(filename) as f:
+        headers = next(csv.reader(f), None)
+    if headers is None:
+        return []
+    if columns is None:
+        columns = headers
+    indices = [ headers.index(name) for name in columns ]
+    types = [ casting_functions[index] for index in indices ]
+    rows = iter_mmap_rows(filename, indices, types, skip=1)
+    return [ dict(zip(columns, row)) for row in rows ]
@@ -79,6 +79,11 @@ class RideData(collections.abc.Sequence):
             return newRideData
 
 
+    def column(self, name):
+        # A whole column by field name, e.g. for tableformat.print_table()
+        return { 'route': self.routes, 'date': self.dates,
+                 'daytype': self.daytypes, 'rides': self.numrides }[name]
+
     def append(self, d):
         self.routes.append(d['route'])
         self.dates.append(d['date'])
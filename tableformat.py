@@ -29,9 +29,34 @@
 # Ex 3.7: Modify the `TableFormatter` base class so that it is defined as a proper
 # abstract base class using the `abc` module.
 
+import sys
 from abc import ABC, abstractmethod
 
 class TableFormatter(ABC):
+    # Formatters write to file (sys.stdout if None) through a buffer that
+    # is flushed in blocks of about bufsize characters, rather than
+    # printing each row.  flush() writes out whatever is pending.  With
+    # bufsize=0 each row is written as soon as it's formatted.
+    def __init__(self, file=None, bufsize=65536):
+        self.file = file
+        self.bufsize = bufsize
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.bufsize:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            file = self.file or sys.stdout
+            file.write(''.join(self._buffer))
+            file.flush()
+            self._buffer.clear()
+            self._buffered = 0
+
     @abstractmethod  # forces subclasses to implement this meth
     def headings(self, headers):
         raise NotImplementedError() # could just pass now since this is an ABC
@@ -46,19 +71,19 @@ class TableFormatter(ABC):
 
 class TextTableFormatter(TableFormatter):
     def headings(self, headers):
-        print(' '.join('%10s' % h for h in headers))
-        print(('-'*10 + ' ')*len(headers))
+        self.write(' '.join('%10s' % h for h in headers) + '\n')
+        self.write(('-'*10 + ' ')*len(headers) + '\n')
     
     def row(self, rowdata):
-        print(' '.join('%10s' % d for d in rowdata))
+        self.write(' '.join('%10s' % d for d in rowdata) + '\n')
 
 
 class CSVTableFormatter(TableFormatter):
     def headings(self, headers):
-        print(",".join(headers))
+        self.write(",".join(headers) + "\n")
     
     def row(self, rowdata):
-        print(",".join(map(str, rowdata)))
+        self.write(",".join(map(str, rowdata)) + "\n")
 
 
 # <tr> <th>name</th> <th>shares</th> <th>price</th> </tr>
@@ -66,11 +91,11 @@ class CSVTableFormatter(TableFormatter):
 class HTMLTableFormatter(TableFormatter):
     def headings(self, headers):
         middle = " ".join(f"<td>{h}</td>" for h in headers)
-        print(f"<tr> {middle} </tr>")
+        self.write(f"<tr> {middle} </tr>\n")
 
     def row(self, rowdata):
         middle = " ".join(f"<td>{d}</td>" for d in rowdata)
-        print(f"<tr> {middle} </tr>")
+        self.write(f"<tr> {middle} </tr>\n")
 
 # Ex 3.7: Modify the `print_table()` function  so that it checks if the
 # supplied formatter instance inherits from `TableFormatter`.  If
@@ -83,6 +108,7 @@ def print_table(records, fields, formatter):
     for r in records:
         rowdata = [getattr(r, fieldname) for fieldname in fields]
         formatter.row(rowdata)
+    formatter.flush()
 
 # Ex 3.8
 
@@ -112,7 +138,8 @@ class UpperHeadersMixin:
 # formatter = create_formatter('csv', column_formats=['"%s"','%d','%0.2f'])
 # create_formatter('text', upper_headers=True)
 
-def create_formatter(formatname, upper_headers=False, column_formats=('"%s"','%d','%0.2f')):
+def create_formatter(formatname, upper_headers=False, column_formats=('"%s"','%d','%0.2f'),
+                     file=None, bufsize=65536):
     # formats = {'text': TextTableFormatter(), 'csv': CSVTableFormatter(),
     #            'html': HTMLTableFormatter()}
     # if formatname in formats:
@@ -124,13 +151,13 @@ def create_formatter(formatname, upper_headers=False, column_formats=('"%s"','%d
         if upper_headers:
             class PF(UpperHeadersMixin, TextTableFormatter):
                 pass
-            return PF()
+            return PF(file, bufsize)
         else:
-            return TextTableFormatter()
+            return TextTableFormatter(file, bufsize)
     if formatname == 'csv':
         class PF(ColumnFormatMixin, CSVTableFormatter):
             formats = column_formats
-        return PF()
+        return PF(file, bufsize)
     raise RuntimeError(f"Format {formatname} unknown")
 
 # the above is particularly horrible. Here's how the solutions do it
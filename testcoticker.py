@@ -0,0 +1,134 @@
+# testcoticker.py
+
+import asyncio
+import csv
+import io
+import unittest
+import time
+from coticker import (CSVDecoder, decode_csv, to_csv, to_csv_batch, ato_csv,
+                      Ticker, create_ticker_batch, negchange_batch)
+from cofollow import consumer, batcher
+
+text = ('"AA",39.48,"6/11/2007"\n'
+        'a,"b\nc",1\n'
+        '"x""y",é,"€\r\n2"\r\n'
+        'AA,5" pipe,3\n'
+        '\n'
+        'x,y z\x0c," "\n'
+        'last,"q",3')
+expected = list(csv.reader(io.StringIO(text, newline='')))
+
+@consumer
+def collect(rows):
+    while True:
+        rows.append((yield))
+
+class TestCSVDecoder(unittest.TestCase):
+    def test_expected(self):
+        # What csv.reader makes of the whole text at once
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(expected[1], ['a', 'b\nc', '1'])
+        self.assertEqual(expected[3], ['AA', '5" pipe', '3'])
+        self.assertEqual(expected[5], ['x', 'y z\x0c', ' '])
+
+    def test_chunk_boundaries(self):
+        # Every chunk size, so that each row, quoted newline, CRLF and
+        # multi-byte character is split at every possible point
+        data = text.encode('utf-8')
+        for size in range(1, len(data) + 1):
+            rows = []
+            decoder = decode_csv(collect(rows))
+            for n in range(0, len(data), size):
+                decoder.send(data[n:n+size])
+            decoder.close()
+            self.assertEqual(rows, expected, f'chunks of {size} bytes')
+
+    def test_text(self):
+        decoder = CSVDecoder()
+        rows = decoder.feed(text[:40]) + decoder.feed(text[40:])
+        self.assertEqual(rows + decoder.close(), expected)
+
+    def test_stray_quote(self):
+        # A quote in an unquoted field doesn't hold back the rows after it
+        decoder = CSVDecoder()
+        self.assertEqual(decoder.feed('AA,5" pipe,3\n'), [['AA', '5" pipe', '3']])
+        self.assertEqual(decoder.feed('IBM,1,2\n'), [['IBM', '1', '2']])
+        self.assertEqual(decoder.pending, '')
+
+    def test_lines(self):
+        lines = io.StringIO(text, newline='').readlines()
+        rows = []
+        pipeline = to_csv(collect(rows))
+        for line in lines:
+            pipeline.send(line)
+        self.assertEqual(rows, expected)
+
+        # Split into two batches at every line, including inside the
+        # quoted fields
+        for n in range(len(lines) + 1):
+            rows = []
+            pipeline = to_csv_batch(collect(rows))
+            pipeline.send(lines[:n])
+            pipeline.send(lines[n:])
+            self.assertEqual(sum(rows, []), expected, f'split at line {n}')
+
+    def test_target_error(self):
+        # An IndexError from the target isn't mistaken for the reader
+        # running out of lines
+        @consumer
+        def fail():
+            yield
+            raise IndexError('from target')
+        with self.assertRaisesRegex(IndexError, 'from target'):
+            to_csv(fail()).send('a,b\n')
+
+    def test_async(self):
+        async def alines():
+            for line in io.StringIO(text, newline=''):
+                yield line
+
+        async def rows():
+            return [ row async for row in ato_csv(alines()) ]
+
+        self.assertEqual(asyncio.run(rows()), expected)
+
+class TestBatches(unittest.TestCase):
+    def test_batcher_size(self):
+        batches = []
+        pipeline = batcher(collect(batches), size=3, window=60)
+        for n in range(7):
+            pipeline.send(n)
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5]])
+        pipeline.close()
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_batcher_window(self):
+        batches = []
+        pipeline = batcher(collect(batches), size=100, window=0.05)
+        pipeline.send(1)
+        pipeline.send(None)             # Window not up yet
+        self.assertEqual(batches, [])
+        time.sleep(0.06)
+        pipeline.send(None)             # A quiet source's tick flushes it
+        self.assertEqual(batches, [[1]])
+        pipeline.send(None)
+        pipeline.send(2)
+        time.sleep(0.06)
+        pipeline.send(3)                # So does the next item
+        self.assertEqual(batches, [[1], [2, 3]])
+
+    def test_ticker_batches(self):
+        with open('Data/stocklog.csv') as f:
+            rows = list(csv.reader(f.readlines()[:20]))
+        batches = []
+        pipeline = create_ticker_batch(negchange_batch(collect(batches)))
+        pipeline.send(rows[:10])
+        pipeline.send(rows[10:])
+        tickers = [ Ticker.from_row(row) for row in rows ]
+        self.assertEqual([ repr(t) for t in sum(batches, []) ],
+                         [ repr(t) for t in tickers if t.change < 0 ])
+        self.assertTrue(batches)
+        self.assertTrue(all(batches))   # Empty batches aren't passed on
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# testfollow.py
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from follow import (follow_batches, follow_chunks, follow_batches_async,
+                    PollWaiter, InotifyWaiter, Inotify, make_waiter)
+
+try:
+    InotifyWaiter(__file__).close()
+    have_inotify = True
+except (OSError, AttributeError):
+    have_inotify = False
+
+class FollowTests:
+    # Run against each kind of waiter by the subclasses below
+    def make_waiter(self, filename):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'log.csv')
+        with open(self.filename, 'w') as f:
+            f.write('old\n')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def append(self, text):
+        with open(self.filename, 'a') as f:
+            f.write(text)
+
+    def later(self, *steps, delay=0.05):
+        # Carry out steps (functions) one after the other in a thread
+        def run():
+            for step in steps:
+                time.sleep(delay)
+                step()
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def truncate(self):
+        with open(self.filename, 'w') as f:
+            f.write('t\n')
+
+    def rotate(self):
+        os.rename(self.filename, self.filename + '.1')
+        time.sleep(0.05)
+        with open(self.filename, 'w') as f:
+            f.write('new\n')
+
+    def follow(self, *steps, until):
+        batches = follow_batches(self.filename, waiter=self.make_waiter(self.filename))
+        self.later(*steps)
+        got = []
+        for lines in batches:
+            got.extend(lines)
+            if got[-1] == until:
+                break
+        batches.close()
+        return got
+
+    def test_appended(self):
+        got = self.follow(lambda: self.append('a\nb\n'), lambda: self.append('c\n'),
+                          until='c\n')
+        self.assertEqual(got, ['a\n', 'b\n', 'c\n'])
+
+    def test_partial_line(self):
+        got = self.follow(lambda: self.append('a\nb'), lambda: self.append('c\n'),
+                          until='bc\n')
+        self.assertEqual(got, ['a\n', 'bc\n'])
+
+    def test_truncated(self):
+        got = self.follow(lambda: self.append('a\n'), self.truncate,
+                          lambda: self.append('u\n'), until='u\n')
+        self.assertEqual(got, ['a\n', 't\n', 'u\n'])
+
+    def test_rotated(self):
+        # Lines written to the old file before it's replaced aren't lost
+        got = self.follow(lambda: self.append('a\n'), lambda: self.append('b\n') or self.rotate(),
+                          until='new\n')
+        self.assertEqual(got, ['a\n', 'b\n', 'new\n'])
+
+    def test_idle(self):
+        batches = follow_batches(self.filename, waiter=self.make_waiter(self.filename), idle=0.05)
+        start = time.perf_counter()
+        self.assertEqual(next(batches), [])
+        self.assertEqual(next(batches), [])
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.append('a\n')
+        self.assertEqual(next(batches), ['a\n'])
+        batches.close()
+
+    def test_chunks(self):
+        chunks = follow_chunks(self.filename, waiter=self.make_waiter(self.filename))
+        self.later(lambda: self.append('a\nb'))
+        self.assertEqual(next(chunks), b'a\nb')
+        chunks.close()
+
+    def test_async(self):
+        async def follow():
+            got = []
+            async for lines in follow_batches_async(self.filename, waiter=waiter):
+                got.extend(lines)
+                if got[-1] == 'c\n':
+                    return got
+
+        waiter = None
+        async def main():
+            nonlocal waiter
+            waiter = self.make_waiter(self.filename)
+            self.later(lambda: self.append('a\nb'), lambda: self.append('\nc\n'))
+            return await asyncio.wait_for(follow(), 5)
+
+        self.assertEqual(asyncio.run(main()), ['a\n', 'b\n', 'c\n'])
+
+class TestPollWaiter(FollowTests, unittest.TestCase):
+    def make_waiter(self, filename):
+        return PollWaiter(filename)
+
+@unittest.skipUnless(have_inotify, 'inotify is not available')
+class TestInotifyWaiter(FollowTests, unittest.TestCase):
+    def make_waiter(self, filename):
+        return InotifyWaiter(filename)
+
+    def test_default(self):
+        waiter = make_waiter(self.filename)
+        self.assertIsInstance(waiter, InotifyWaiter)
+        waiter.close()
+
+    def test_shared(self):
+        # Waiters share an inotify instance, and only the one for the
+        # file that changed is woken
+        other = os.path.join(self.tmpdir.name, 'other.csv')
+        first, second = InotifyWaiter(self.filename), InotifyWaiter(other)
+        self.assertIs(first.inotify, second.inotify)
+        self.append('a\n')
+        first.wait(timeout=1.0)
+        start = time.perf_counter()
+        second.wait(timeout=0.2)
+        self.assertGreater(time.perf_counter() - start, 0.15)
+        first.close()
+        second.close()
+        self.assertNotIn(threading.current_thread(), Inotify._instances)
+
+if __name__ == '__main__':
+    unittest.main()
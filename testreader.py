@@ -0,0 +1,54 @@
+# testreader.py
+
+import os
+import tempfile
+import unittest
+from reader import read_csv_as_dicts, read_csv_as_dicts_mmap, iter_mmap_rows
+
+class TestMmapReader(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, data):
+        filename = os.path.join(self.tmpdir.name, 'data.csv')
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def test_same_as_csv(self):
+        # Data/portfolio.csv has quoted names and plain numbers
+        types = [str, int, float]
+        self.assertEqual(read_csv_as_dicts_mmap('Data/portfolio.csv', types),
+                         read_csv_as_dicts('Data/portfolio.csv', types))
+
+    def test_columns(self):
+        rows = read_csv_as_dicts_mmap('Data/portfolio.csv', [str, int, float],
+                                      columns=['price', 'name'])
+        self.assertEqual(rows[0], {'price': 32.2, 'name': 'AA'})
+        self.assertEqual(len(rows), 7)
+
+    def test_quoted_numbers(self):
+        filename = self.write(b'name,shares,price\n"AA","100","32.2"\n')
+        self.assertEqual(read_csv_as_dicts_mmap(filename, [str, int, float]),
+                         [{'name': 'AA', 'shares': 100, 'price': 32.2}])
+
+    def test_crlf(self):
+        filename = self.write(b'name,shares,price\r\nAA,100,32.2\r\n\r\nIBM,50,91.1\r\n')
+        self.assertEqual(read_csv_as_dicts_mmap(filename, [str, int, float]),
+                         [{'name': 'AA', 'shares': 100, 'price': 32.2},
+                          {'name': 'IBM', 'shares': 50, 'price': 91.1}])
+
+    def test_whitespace_separated(self):
+        rows = list(iter_mmap_rows('Data/portfolio.dat', [0, 2], [str, float], sep=None))
+        self.assertEqual(rows[:2], [('AA', 32.2), ('IBM', 91.1)])
+
+    def test_empty_file(self):
+        filename = self.write(b'')
+        self.assertEqual(list(iter_mmap_rows(filename, [0], [str])), [])
+        self.assertEqual(read_csv_as_dicts_mmap(filename, [str]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import unittest
 from stock import *
+from validate import set_validation, get_validation
 
 class TestStock(unittest.TestCase):
     def test_create(self):
@@ -80,6 +81,60 @@ class TestStock(unittest.TestCase):
 # - Test the comparison operator method `__eq__()`
 
 
+class TestValidationMode(unittest.TestCase):
+    def tearDown(self):
+        set_validation('full')
+
+    def test_off(self):
+        set_validation('off')
+        s = Stock('GOOG', 100, 490.1)
+        s.shares = -50
+        s.sell(-10)
+        self.assertEqual(s.shares, -40)
+
+    def test_sampled(self):
+        set_validation('sampled', every=2)
+        s = Stock('GOOG', 100, 490.1)
+        failures = 0
+        for _ in range(10):
+            try:
+                s.shares = -50
+            except ValueError:
+                failures += 1
+        self.assertEqual(failures, 5)
+
+    def test_back_to_full(self):
+        set_validation('off')
+        set_validation('full')
+        self.assertEqual(get_validation(), 'full')
+        s = Stock('GOOG', 100, 490.1)
+        with self.assertRaises(ValueError):
+            s.shares = -50
+
+    def test_bad_mode(self):
+        with self.assertRaises(ValueError):
+            set_validation('sometimes')
+
+class TestVarArgs(unittest.TestCase):
+    # Only the annotated parameters are checked when one of them is *args/**kwargs
+    def test_enforce(self):
+        from validate import enforce, Integer, Typed
+        class Tuple(Typed):
+            expected_type = tuple
+        self.assertEqual(enforce(rest=Tuple)(lambda x, *rest: x)(1, 2), 1)
+        with self.assertRaises(TypeError):
+            enforce(x=Integer, rest=Tuple)(lambda x, *rest: x)('1', 2)
+
+    def test_validated(self):
+        from validate import validated, ValidatedFunction, Integer
+        def add(x: Integer, *rest):
+            return x + sum(rest)
+        for wrapped in (validated(add), ValidatedFunction(add)):
+            self.assertEqual(wrapped(1, 2, 3), 6)
+            with self.assertRaises(TypeError):
+                wrapped('1', 2)
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -19,7 +19,7 @@ if __name__ == '__main__':
     import csv
     from tableformat import create_formatter, print_table
 
-    formatter = create_formatter('text')
+    formatter = create_formatter('text', bufsize=0)     # Show each row as it arrives
 
     lines = follow('Data/stocklog.csv')
     rows = csv.reader(lines)